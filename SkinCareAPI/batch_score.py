@@ -0,0 +1,188 @@
+#batch_score.py
+# Fotoğraf arşivini API'yi çağırmadan yeniden skorlar (ağırlıklar değiştiğinde).
+# API ile aynı model motorunu, yüz kırpmayı ve THRESHOLDS değerlerini kullanır.
+#
+#   python batch_score.py /data/photos --output scores.csv
+#   python batch_score.py /data/photos --output scores_parquet/ --format parquet --workers 8
+#
+# Yarıda kesilen bir çalıştırma aynı komutla devam ettirilir: çıktıda bulunan
+# dosyalar atlanır.
+import argparse
+import csv
+import logging
+import os
+from typing import Dict, List, Set
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from data.skin_issues import LABELS, apply_thresholds
+from inference.engines import ENGINES, create_engine
+from inference.face_detector import FaceDetector, crop_first_face
+from inference.preprocessing import face_to_tensor
+from inference.uploads import IMAGE_EXTENSIONS
+COLUMNS = ["path", "status"] + [f"prob_{label}" for label in LABELS] + ["detected"]
+
+
+def list_images(root: str) -> List[str]:
+    paths = []
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(directory, filename), root))
+    return sorted(paths)
+
+
+class FaceCropDataset(Dataset):
+    """Her görsel için (tensör, yol, durum) döner; yüz bulunamazsa tensör sıfırdır."""
+
+    def __init__(self, root: str, paths: List[str], detector: FaceDetector, decode_min_side: int):
+        self.root = root
+        self.paths = paths
+        self.detector = detector
+        self.decode_min_side = decode_min_side
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, idx):
+        path = self.paths[idx]
+        tensor = np.zeros((3, 224, 224), dtype=np.float32)
+        try:
+            with open(os.path.join(self.root, path), "rb") as f:
+                face = crop_first_face(f.read(), self.detector, min_side=self.decode_min_side)
+        except OSError as e:
+            logging.error(f"Could not read {path}: {e}")
+            return torch.from_numpy(tensor), path, "read_error"
+
+        if face is None:
+            return torch.from_numpy(tensor), path, "no_face"
+        face_to_tensor(face, out=tensor)
+        return torch.from_numpy(tensor), path, "ok"
+
+
+class CsvScoreWriter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def done_paths(self) -> Set[str]:
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return {row["path"] for row in csv.DictReader(f)}
+
+    def write(self, rows: List[Dict]):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetScoreWriter:
+    """Parquet dosyalarına ekleme yapılamadığı için her chunk ayrı bir part dosyasıdır."""
+
+    def __init__(self, directory: str):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("pyarrow is not installed: pip install pyarrow (or use --format csv)")
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _parts(self) -> List[str]:
+        return sorted(f for f in os.listdir(self.directory) if f.startswith("part-") and f.endswith(".parquet"))
+
+    def done_paths(self) -> Set[str]:
+        import pyarrow.parquet as pq
+        done = set()
+        for part in self._parts():
+            done.update(pq.read_table(os.path.join(self.directory, part), columns=["path"]).column("path").to_pylist())
+        return done
+
+    def write(self, rows: List[Dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.schema(
+            [("path", pa.string()), ("status", pa.string())]
+            + [(f"prob_{label}", pa.float32()) for label in LABELS]
+            + [("detected", pa.string())]
+        )
+        table = pa.Table.from_pylist(rows, schema=schema)
+        part = os.path.join(self.directory, f"part-{len(self._parts()):05d}.parquet")
+        # Yarım yazılmış part dosyası bir sonraki çalıştırmada okunmasın diye önce geçici ada yazılır
+        pq.write_table(table, part + ".tmp")
+        os.replace(part + ".tmp", part)
+
+
+def to_rows(paths, statuses, probs) -> List[Dict]:
+    rows = []
+    for path, status, row in zip(paths, statuses, probs):
+        record = {"path": path, "status": status, "detected": ""}
+        for i, label in enumerate(LABELS):
+            record[f"prob_{label}"] = float(row[i]) if status == "ok" else None
+        if status == "ok":
+            detected = apply_thresholds(row)
+            record["detected"] = ";".join(detected if detected else ["no_skin_issue_detected"])
+        rows.append(record)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch scoring of a photo archive")
+    parser.add_argument("input_dir")
+    parser.add_argument("--output", required=True, help="CSV dosyası veya parquet part klasörü")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--model", default="75epoch-convnextbase.pth")
+    parser.add_argument("--engine", default="eager", choices=sorted(ENGINES))
+    parser.add_argument("--artifact", help="Motor artifact yolu (bkz. inference/engines.py)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="DataLoader worker süreç sayısı")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Her yazmada diske aktarılan satır sayısı")
+    parser.add_argument("--decode-min-side", type=int, default=0)
+    parser.add_argument("--detection-max-side", type=int, default=640)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    writer = CsvScoreWriter(args.output) if args.format == "csv" else ParquetScoreWriter(args.output)
+    done = writer.done_paths()
+    paths = [p for p in list_images(args.input_dir) if p not in done]
+    logging.info(f"{len(done)} already scored, {len(paths)} remaining")
+    if not paths:
+        return
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    engine = create_engine(args.engine, args.model, device, args.artifact)
+
+    dataset = FaceCropDataset(args.input_dir, paths, FaceDetector(detection_max_side=args.detection_max_side),
+                              args.decode_min_side)
+    loader = DataLoader(dataset, batch_size=args.batch_size, num_workers=args.workers, shuffle=False)
+
+    pending: List[Dict] = []
+    scored = 0
+    for tensors, batch_paths, statuses in loader:
+        ok = [i for i, status in enumerate(statuses) if status == "ok"]
+        probs = np.zeros((len(batch_paths), len(LABELS)), dtype=np.float32)
+        if ok:
+            probs[ok] = engine.predict(tensors[ok])
+
+        pending.extend(to_rows(batch_paths, statuses, probs))
+        if len(pending) >= args.chunk_size:
+            writer.write(pending)
+            scored += len(pending)
+            logging.info(f"Scored {scored}/{len(paths)}")
+            pending = []
+
+    if pending:
+        writer.write(pending)
+        scored += len(pending)
+    logging.info(f"Done: {scored} images written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
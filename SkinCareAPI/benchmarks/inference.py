@@ -0,0 +1,268 @@
+#inference.py (benchmark)
+# Analiz hattının çevrimdışı mikro-benchmark'ı: aşama bazlı ve uçtan uca gecikme
+# (p50/p95/p99), farklı batch boyutlarında throughput, model yükleme süresi ve tepe RSS.
+# Sonuçlar JSON olarak kaydedilir ve bir önceki çalıştırmayla karşılaştırılır.
+#
+# Kullanım (SkinCareAPI klasöründen):
+#   python -m benchmarks.inference                        # sentetik görseller, rastgele ağırlıklar
+#   python -m benchmarks.inference --weights 75epoch-convnextbase.pth --images faces/
+#   python -m benchmarks.inference --baseline benchmarks/results/inference-20261001-120000.json \
+#       --tolerance 0.1 --fail-on-regression
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.preprocessing import face_box, synthetic_jpeg  # noqa: E402
+from inference.engines import ENGINES, EagerEngine, create_engine  # noqa: E402
+from inference.face_detector import FaceDetector  # noqa: E402
+from inference.model import MODEL_ARCH, build_model  # noqa: E402
+from inference.preprocessing import decode_reduced, face_to_tensor  # noqa: E402
+from inference.uploads import IMAGE_EXTENSIONS  # noqa: E402
+from monitoring.memory import current_rss_mb, peak_rss_mb, reset_peak_rss  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+STAGES = ("decode", "face_detection", "preprocess", "forward", "end_to_end")
+
+
+def percentiles(timings: List[float]) -> Dict[str, float]:
+    values = np.asarray(timings) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "mean": round(float(values.mean()), 3)}
+
+
+def load_images(folder: Optional[str], count: int) -> List[bytes]:
+    if not folder:
+        # Farklı boyutlarda telefon fotoğrafları (12 MP, 8 MP, 2 MP)
+        # Üretim yüzlerce MB geçici dizi ayırır; tepe RSS'e girmesin diye ayrı süreçte yapılır
+        sizes = [(4000, 3000), (3264, 2448), (1920, 1080)]
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            return pool.starmap(synthetic_jpeg, [sizes[i % len(sizes)] for i in range(min(count, len(sizes)))])
+
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise SystemExit(f"No images in {folder}")
+    images = []
+    for path in paths[:count]:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return images
+
+
+def load_engine(backend: str, weights: Optional[str], artifact: Optional[str]):
+    """Motoru yükler; ağırlık dosyası yoksa (çevrimdışı/CI) rastgele ağırlıklı eager model kullanır."""
+    cpu = torch.device("cpu")
+    start = time.perf_counter()
+    if weights and os.path.exists(weights):
+        engine = create_engine(backend, weights, cpu, artifact)
+        source = weights
+    else:
+        if backend != "eager":
+            raise SystemExit(f"--weights is required for the {backend} backend")
+        logging.warning("No weights file: benchmarking randomly initialised weights")
+        engine = EagerEngine(build_model().eval(), cpu)
+        source = "random"
+    return engine, source, time.perf_counter() - start
+
+
+def run_pipeline(image_bytes: bytes, detector: FaceDetector, engine, min_side: int,
+                 out: np.ndarray, timings: Dict[str, List[float]]):
+    """API'deki tek görsel yolu: decode -> yüz tespiti -> preprocess -> forward."""
+    start = time.perf_counter()
+    img, _ = decode_reduced(image_bytes, min_side=min_side)
+    decoded = time.perf_counter()
+
+    boxes = detector.detect(img)
+    detected = time.perf_counter()
+
+    # Sentetik görsellerde yüz yoktur: hesaplama maliyeti aynı olan sabit bir bölge kırpılır
+    x, y, w, h = boxes[0] if boxes else face_box(img)
+    tensor = torch.from_numpy(face_to_tensor(img[y:y + h, x:x + w], out=out))
+    preprocessed = time.perf_counter()
+
+    engine.predict(tensor.unsqueeze(0))
+    end = time.perf_counter()
+
+    timings["decode"].append(decoded - start)
+    timings["face_detection"].append(detected - decoded)
+    timings["preprocess"].append(preprocessed - detected)
+    timings["forward"].append(end - preprocessed)
+    timings["end_to_end"].append(end - start)
+
+
+def measure_throughput(engine, batch_sizes: List[int], iterations: int) -> Dict[str, float]:
+    """Her batch boyutu için saniyede işlenen görüntü (medyan forward süresinden)."""
+    results = {}
+    for batch_size in batch_sizes:
+        batch = torch.zeros(batch_size, 3, 224, 224)
+        engine.predict(batch)  # ısınma
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            engine.predict(batch)
+            timings.append(time.perf_counter() - start)
+        results[str(batch_size)] = round(batch_size / float(np.median(timings)), 2)
+    return results
+
+
+def run_benchmark(args) -> Dict:
+    images = load_images(args.images, args.max_images)
+    # Tepe RSS sadece motor yükleme ve analiz hattını kapsasın
+    reset_peak_rss()
+    rss_before = current_rss_mb()
+    engine, source, load_seconds = load_engine(args.backend, args.weights, args.artifact)
+    rss_after_load = current_rss_mb()
+
+    detector = FaceDetector(detection_max_side=args.detection_max_side)
+    out = np.empty((3, 224, 224), dtype=np.float32)
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    # Isınma: ilk forward'daki tembel başlatmalar ölçüme girmesin
+    for image_bytes in images:
+        run_pipeline(image_bytes, detector, engine, args.min_side, out, {stage: [] for stage in STAGES})
+    for i in range(args.iterations):
+        run_pipeline(images[i % len(images)], detector, engine, args.min_side, out, timings)
+
+    throughput = measure_throughput(engine, args.batch_sizes, args.throughput_iterations)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "backend": args.backend,
+            "arch": MODEL_ARCH,
+            "weights": source,
+            "images": args.images or "synthetic",
+            "iterations": args.iterations,
+            "min_side": args.min_side,
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "latency_ms": {stage: percentiles(values) for stage, values in timings.items()},
+        "throughput_images_per_s": throughput,
+        "model_load_seconds": round(load_seconds, 3),
+        "memory_mb": {
+            "model_load_rss_delta": round(rss_after_load - rss_before, 1),
+            "peak_rss": round(peak_rss_mb(), 1),
+        },
+    }
+
+
+# ----------------------------------------------------------------------------
+# Baseline karşılaştırması
+# ----------------------------------------------------------------------------
+def latest_result(directory: str, exclude: Optional[str] = None) -> Optional[str]:
+    paths = sorted(glob.glob(os.path.join(directory, "inference-*.json")))
+    paths = [p for p in paths if os.path.abspath(p) != os.path.abspath(exclude or "")]
+    return paths[-1] if paths else None
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Her metrik için değişim oranı; `tolerance` üzerindeki kötüleşmeler regresyondur."""
+    rows = []
+
+    def add(name: str, old: Optional[float], new: Optional[float], higher_is_better: bool = False):
+        if old is None or new is None or old == 0:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        rows.append({"metric": name, "baseline": old, "current": new,
+                     "change": change, "regression": worse > tolerance})
+
+    for stage in STAGES:
+        for stat in ("p50", "p95", "p99"):
+            add(f"latency {stage} {stat} (ms)",
+                baseline.get("latency_ms", {}).get(stage, {}).get(stat),
+                current["latency_ms"][stage][stat])
+    for batch_size, value in current["throughput_images_per_s"].items():
+        add(f"throughput bs={batch_size} (img/s)",
+            baseline.get("throughput_images_per_s", {}).get(batch_size), value, higher_is_better=True)
+    add("model load (s)", baseline.get("model_load_seconds"), current["model_load_seconds"])
+    add("peak RSS (MB)", baseline.get("memory_mb", {}).get("peak_rss"), current["memory_mb"]["peak_rss"])
+    return rows
+
+
+def print_report(rows: List[Dict], baseline_path: str, tolerance: float):
+    print(f"\nKarşılaştırma: {baseline_path} (tolerans ±{tolerance:.0%})")
+    print(f"{'metric':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['metric']:<36}{row['baseline']:>12.2f}{row['current']:>12.2f}{row['change']:>+10.1%}{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\n{regressions} regression(s) out of {len(rows)} metrics")
+
+
+def print_summary(result: Dict):
+    print(f"{'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in result["latency_ms"].items():
+        print(f"{stage:<16}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}")
+    print("\nthroughput (img/s): " + ", ".join(
+        f"bs={bs}: {value:.1f}" for bs, value in result["throughput_images_per_s"].items()))
+    print(f"model load: {result['model_load_seconds']:.2f}s, peak RSS: {result['memory_mb']['peak_rss']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference micro-benchmark")
+    parser.add_argument("--backend", choices=sorted(ENGINES), default="eager")
+    parser.add_argument("--weights", default="75epoch-convnextbase.pth",
+                        help="Yoksa rastgele ağırlıklar kullanılır (sadece eager)")
+    parser.add_argument("--artifact", default=None)
+    parser.add_argument("--images", default=None, help="Yüz fotoğrafları klasörü (verilmezse sentetik)")
+    parser.add_argument("--max-images", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--throughput-iterations", type=int, default=10)
+    parser.add_argument("--min-side", type=int, default=0, help="DECODE_MIN_SIDE değeri")
+    parser.add_argument("--detection-max-side", type=int, default=640)
+    parser.add_argument("--output", default=None,
+                        help=f"Sonuç dosyası (varsayılan: {RESULTS_DIR}/inference-<zaman>.json)")
+    parser.add_argument("--baseline", default=None,
+                        help="Karşılaştırılacak sonuç (varsayılan: sonuç klasöründeki en son çalıştırma)")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    result = run_benchmark(args)
+    print_summary(result)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"inference-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    baseline_path = args.baseline or latest_result(os.path.dirname(output), exclude=output)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSonuç kaydedildi: {output}")
+
+    if baseline_path is None:
+        print("Önceki sonuç yok; bu çalıştırma baseline olarak kullanılacak.")
+        return
+
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("backend") != result["meta"]["backend"]:
+        logging.warning("Baseline was measured with a different backend")
+    rows = compare(result, baseline, args.tolerance)
+    print_report(rows, baseline_path, args.tolerance)
+
+    if args.fail_on_regression and any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
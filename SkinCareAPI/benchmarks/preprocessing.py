@@ -0,0 +1,237 @@
+#preprocessing.py (benchmark)
+# Eski yol (imdecode -> cvtColor -> PIL -> torchvision transform) ile
+# inference/preprocessing.py içindeki birleşik yolu karşılaştırır: hız, bellek ve parity.
+# Bellek, her yol için ayrı bir süreçte ölçülen ek tepe RSS'tir (C tamponları dahil).
+#
+# Kullanım (SkinCareAPI klasöründen):
+#   python -m benchmarks.preprocessing [--image foto.jpg] [--iterations 20]
+#   python -m benchmarks.preprocessing --faces yuzler/ --model 75epoch-convnextbase.pth
+#
+# --faces ile gerçek yüz fotoğraflarında tensör ve logit farkı ölçülür; tam çözünürlüklü yol
+# --tensor-atol / --logit-atol içinde kalmazsa çıkış kodu 1 olur. Küçültülmüş decode
+# (DECODE_MIN_SIDE > 0) için logit farkı ve eşik kararlarının kaç kez değiştiği raporlanır.
+import argparse
+import gc
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import transforms
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.skin_issues import apply_thresholds  # noqa: E402
+from inference.face_detector import FaceDetector  # noqa: E402
+from inference.model import load_model  # noqa: E402
+from inference.preprocessing import decode_image, decode_reduced, face_to_tensor  # noqa: E402
+from inference.uploads import IMAGE_EXTENSIONS  # noqa: E402
+from monitoring.memory import current_rss_mb, peak_rss_mb, reset_peak_rss  # noqa: E402
+
+legacy_transform = transforms.Compose([
+    transforms.Resize(256),
+    transforms.CenterCrop(224),
+    transforms.ToTensor(),
+    transforms.Normalize([0.485, 0.456, 0.406],
+                         [0.229, 0.224, 0.225])
+])
+
+# Yüz kutusu görüntünün oransal bir bölgesi olarak verilir (sentetik görselde yüz yoktur)
+FACE_BOX = (0.3, 0.25, 0.4, 0.4)  # x, y, w, h
+
+
+def synthetic_jpeg(width=4000, height=3000, quality=92) -> bytes:
+    # 12 MP telefon fotoğrafı boyutunda sentetik görsel: yumuşak gradyan + piksel seviyesinde
+    # doku (gözenek/kırışıklık gibi yüksek frekans olmadan resize filtreleri ayırt edilemez)
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, size=(height // 50, width // 50, 3), dtype=np.uint8)
+    img = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC).astype(np.int16)
+    img += rng.normal(0, 12, size=img.shape).astype(np.int16)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    return encoded.tobytes()
+
+
+def face_box(img):
+    height, width = img.shape[:2]
+    fx, fy, fw, fh = FACE_BOX
+    return int(fx * width), int(fy * height), int(fw * width), int(fh * height)
+
+
+def legacy_path(image_bytes):
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    x, y, w, h = face_box(img)
+    face_rgb = cv2.cvtColor(img[y:y + h, x:x + w], cv2.COLOR_BGR2RGB)
+    return legacy_transform(Image.fromarray(face_rgb).convert("RGB")).numpy()
+
+
+def fused_path(image_bytes, min_side, out):
+    img = decode_image(image_bytes, min_side=min_side)
+    x, y, w, h = face_box(img)
+    return face_to_tensor(img[y:y + h, x:x + w], out=out)
+
+
+def measure(fn, iterations):
+    fn()  # ısınma
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def _run_path(path: str, image_bytes: bytes, min_side: int, out):
+    if path == "legacy":
+        return legacy_path(image_bytes)
+    return fused_path(image_bytes, min_side, out)
+
+
+def _peak_rss_delta(path: str, image_bytes: bytes, min_side: int) -> Optional[float]:
+    out = np.empty((3, 224, 224), dtype=np.float32)
+    _run_path(path, image_bytes, min_side, out)  # ısınma: tembel başlatmalar ölçüme girmesin
+    gc.collect()
+    if not reset_peak_rss():
+        return None
+    before = current_rss_mb()
+    _run_path(path, image_bytes, min_side, out)
+    return peak_rss_mb() - before
+
+
+def peak_memory(path: str, image_bytes: bytes, min_side: int = 0) -> Optional[float]:
+    # tracemalloc PIL/OpenCV'nin C tamponlarını görmez; RSS tepe değeri temiz bir süreçte ölçülür
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_peak_rss_delta, (path, image_bytes, min_side))
+
+
+def format_mb(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.1f}"
+
+
+def face_tensors(image_bytes, detector, min_side):
+    """Aynı yüz için (eski yol, birleşik tam decode, birleşik küçültülmüş decode) tensörleri."""
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    box = detector.detect_first(img)
+    if box is None:
+        return None
+    x, y, w, h = box
+    face = img[y:y + h, x:x + w]
+    legacy = legacy_transform(Image.fromarray(cv2.cvtColor(face, cv2.COLOR_BGR2RGB)).convert("RGB")).numpy()
+    full = face_to_tensor(face)
+
+    reduced_img, factor = decode_reduced(image_bytes, min_side=min_side)
+    rx, ry, rw, rh = x // factor, y // factor, w // factor, h // factor
+    reduced = face_to_tensor(reduced_img[ry:ry + rh, rx:rx + rw])
+    return legacy, full, reduced
+
+
+def logits_of(model, tensors, batch_size=16):
+    outputs = []
+    with torch.no_grad():
+        for start in range(0, len(tensors), batch_size):
+            batch = torch.from_numpy(np.stack(tensors[start:start + batch_size]))
+            outputs.append(model(batch).float().numpy())
+    return np.concatenate(outputs)
+
+
+def decisions(logits):
+    return [apply_thresholds(1.0 / (1.0 + np.exp(-row))) for row in logits]
+
+
+def face_parity(args) -> bool:
+    """Gerçek yüz fotoğraflarında parity; tam çözünürlüklü yol toleransı aşarsa False."""
+    paths = sorted(p for p in glob.glob(os.path.join(args.faces, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    detector = FaceDetector()
+    legacy, full, reduced = [], [], []
+    for path in paths:
+        with open(path, "rb") as f:
+            found = face_tensors(f.read(), detector, args.min_side)
+        if found is None:
+            continue
+        legacy.append(found[0])
+        full.append(found[1])
+        reduced.append(found[2])
+    if not legacy:
+        raise SystemExit(f"No faces found in {args.faces}")
+
+    full_diff = max(float(np.abs(a - b).max()) for a, b in zip(full, legacy))
+    reduced_diff = max(float(np.abs(a - b).max()) for a, b in zip(reduced, legacy))
+    print(f"\n{len(legacy)} faces from {args.faces}")
+    print(f"max |tensor diff| full decode:    {full_diff:.6f} (atol {args.tensor_atol})")
+    print(f"max |tensor diff| reduced decode: {reduced_diff:.6f} (min_side {args.min_side})")
+    passed = full_diff <= args.tensor_atol
+
+    if args.model:
+        model = load_model(args.model, torch.device("cpu"))
+        reference = logits_of(model, legacy)
+        expected = decisions(reference)
+        for name, tensors in (("full decode", full), ("reduced decode", reduced)):
+            logits = logits_of(model, tensors)
+            diff = float(np.abs(logits - reference).max())
+            flips = sum(a != b for a, b in zip(decisions(logits), expected))
+            print(f"{name:<16} max |logit diff| {diff:.6f}, decision flips {flips}/{len(legacy)} "
+                  f"({100.0 * flips / len(legacy):.1f}%)")
+            if name == "full decode":
+                passed = passed and diff <= args.logit_atol and flips == 0
+
+    print("parity: " + ("PASSED" if passed else "FAILED"))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing benchmark")
+    parser.add_argument("--image", help="JPEG dosyası (verilmezse 12 MP sentetik görsel)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--min-side", type=int, default=1024, help="Karşılaştırılan küçültülmüş decode değeri")
+    parser.add_argument("--faces", help="Parity için gerçek yüz fotoğrafları klasörü")
+    parser.add_argument("--model", help="Logit parity ve karar değişimi için ağırlık dosyası")
+    parser.add_argument("--tensor-atol", type=float, default=1e-5)
+    parser.add_argument("--logit-atol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = synthetic_jpeg()
+
+    out = np.empty((3, 224, 224), dtype=np.float32)
+
+    legacy_ms = measure(lambda: legacy_path(image_bytes), args.iterations)
+    fused_ms = measure(lambda: fused_path(image_bytes, args.min_side, out), args.iterations)
+    exact_ms = measure(lambda: fused_path(image_bytes, 0, out), args.iterations)
+    legacy_mb = peak_memory("legacy", image_bytes)
+    fused_mb = peak_memory("fused", image_bytes, args.min_side)
+    exact_mb = peak_memory("fused", image_bytes, 0)
+
+    reference = legacy_path(image_bytes)
+    full_res_diff = np.abs(fused_path(image_bytes, 0, out) - reference).max()
+    reduced_diff = np.abs(fused_path(image_bytes, args.min_side, out) - reference).max()
+
+    print(f"{'path':<28}{'median ms':>12}{'peak RSS MB':>14}")
+    print(f"{'legacy (PIL + torchvision)':<28}{legacy_ms:>12.2f}{format_mb(legacy_mb):>14}")
+    print(f"{'fused, full decode':<28}{exact_ms:>12.2f}{format_mb(exact_mb):>14}")
+    print(f"{'fused, reduced decode':<28}{fused_ms:>12.2f}{format_mb(fused_mb):>14}")
+    print(f"\nmax |fused - legacy| (full decode):    {full_res_diff:.6f} (atol {args.tensor_atol})")
+    print(f"max |fused - legacy| (reduced decode): {reduced_diff:.6f}")
+    print(f"speedup: {legacy_ms / exact_ms:.1f}x full decode, {legacy_ms / fused_ms:.1f}x reduced decode")
+
+    passed = full_res_diff <= args.tensor_atol
+    if args.faces:
+        passed = face_parity(args) and passed
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#refresher.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from catalog.store import ProductCatalog
+
+
+class CatalogRefresher:
+    """Katalogu arka planda periyodik olarak yeniler; sorunlar arama kotası dağılsın diye sırayla taranır."""
+
+    def __init__(self, catalog: ProductCatalog, crawl: Callable[[str], Awaitable[List[Dict]]],
+                 issues: Sequence[str], refresh_interval_seconds: float = 86400.0,
+                 check_interval_seconds: float = 300.0, issue_delay_seconds: float = 5.0,
+                 lease_seconds: float = 1800.0):
+        self.catalog = catalog
+        self.crawl = crawl
+        self.issues = list(issues)
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.issue_delay_seconds = issue_delay_seconds
+        self.lease_seconds = lease_seconds
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Catalog refresh error: {e}")
+            await asyncio.sleep(self.check_interval_seconds)
+
+    async def refresh_due(self):
+        for issue in self.issues:
+            claimed = await asyncio.to_thread(
+                self.catalog.try_claim, issue, self.refresh_interval_seconds, self.lease_seconds)
+            if not claimed:
+                continue
+            await self.refresh_issue(issue)
+            await asyncio.sleep(self.issue_delay_seconds)
+
+    async def refresh_issue(self, issue: str):
+        try:
+            products = await self.crawl(issue)
+        except Exception as e:
+            logging.error(f"Catalog crawl failed for {issue}: {e}")
+            products = []
+
+        if not products:
+            # Sahiplik lease_seconds sonra düşer; bu süre aynı zamanda yeniden deneme beklemesidir
+            logging.warning(f"Catalog crawl for {issue} returned no products; keeping previous entries")
+            return
+
+        await asyncio.to_thread(self.catalog.replace_issue, issue, products)
+        logging.info(f"Catalog refreshed: {issue} ({len(products)} products)")
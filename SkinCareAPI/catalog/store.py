@@ -0,0 +1,116 @@
+#store.py
+# Cilt sorunu başına ürün kataloğu (SQLite).
+# Arka plandaki CatalogRefresher katalogu periyodik olarak Google Custom Search +
+# Trendyol sayfalarından doldurur; öneri istekleri yerel diskten okunur.
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    issue TEXT NOT NULL,
+    url TEXT NOT NULL,
+    name TEXT,
+    price TEXT,
+    rating REAL,
+    image_url TEXT,
+    brand TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (issue, url)
+);
+CREATE TABLE IF NOT EXISTS refresh_log (
+    issue TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    product_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_COLUMNS = ("url", "name", "price", "rating", "image_url", "brand")
+
+
+class ProductCatalog:
+    """SQLite üzerinde ürün kataloğu; thread başına bağlantı, WAL ile worker'lar aynı dosyayı paylaşır."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # Şema ayrı, hemen kapatılan bir bağlantıyla kurulur: açık bağlantı fork'ta
+        # (serve.py) worker'lara miras kalmasın
+        conn = sqlite3.connect(path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def products(self, issue: str, count: int, min_rating: Optional[float] = None) -> List[Dict]:
+        """Sorun için rastgele sırayla en fazla `count` ürün (puan filtresiyle)."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM products WHERE issue = ?"
+        params: list = [issue]
+        if min_rating is not None:
+            query += " AND rating IS NOT NULL AND rating >= ?"
+            params.append(min_rating)
+        rows = self._connection().execute(query, params).fetchall()
+
+        # Canlı aramadaki gibi her istekte farklı ürünler görünsün
+        products = [dict(row) for row in rows]
+        random.shuffle(products)
+        return [self._to_product(product) for product in products[:count]]
+
+    @staticmethod
+    def _to_product(row: Dict) -> Dict:
+        product = dict(row)
+        product["purchase_link"] = product.pop("url")
+        return product
+
+    def replace_issue(self, issue: str, products: List[Dict]):
+        """Sorunun ürünlerini tek transaction'da yenileriyle değiştirir."""
+        now = time.time()
+        rows = [
+            (issue, p["purchase_link"], p.get("name"), p.get("price"), p.get("rating"),
+             p.get("image_url"), p.get("brand"), now)
+            for p in products if p.get("purchase_link")
+        ]
+        with self._connection() as conn:
+            conn.execute("DELETE FROM products WHERE issue = ?", (issue,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO products (issue, url, name, price, rating, image_url, brand, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT INTO refresh_log (issue, refreshed_at, claimed_at, product_count) VALUES (?, ?, NULL, ?) "
+                "ON CONFLICT(issue) DO UPDATE SET refreshed_at = excluded.refreshed_at, claimed_at = NULL, "
+                "product_count = excluded.product_count", (issue, now, len(rows)))
+
+    def try_claim(self, issue: str, max_age_seconds: float, lease_seconds: float) -> bool:
+        """Sorun yenilenmeye ihtiyaç duyuyorsa ve başka bir süreç üzerinde çalışmıyorsa onu sahiplenir."""
+        # Koşullu UPDATE: aynı anda tek worker kazanır; yarım kalan sahiplik lease_seconds sonra düşer
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO refresh_log (issue) VALUES (?)", (issue,))
+            cursor = conn.execute(
+                "UPDATE refresh_log SET claimed_at = ? WHERE issue = ? AND refreshed_at <= ? "
+                "AND (claimed_at IS NULL OR claimed_at <= ?)",
+                (now, issue, now - max_age_seconds, now - lease_seconds))
+            return cursor.rowcount == 1
+
+    def stats(self) -> Dict[str, Dict]:
+        rows = self._connection().execute(
+            "SELECT issue, refreshed_at, product_count FROM refresh_log ORDER BY issue").fetchall()
+        return {
+            row["issue"]: {
+                "products": row["product_count"],
+                "age_seconds": round(time.time() - row["refreshed_at"]) if row["refreshed_at"] else None,
+            }
+            for row in rows
+        }
@@ -25,6 +25,30 @@ class RecommendationRequest(BaseModel):
     min_rating: Optional[float] = None
 
 
+class FaceBox(BaseModel):
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class QualityRejection(BaseModel):
+    code: str
+    message: str
+    metrics: Dict[str, float]
+
+
+class FaceAnalysis(BaseModel):
+    box: FaceBox
+    detected_skin_issues: List[str] = []
+    # Kalite kontrolünden geçemeyen yüz analiz edilmez; ret nedeni burada döner
+    quality_rejection: Optional[QualityRejection] = None
+
+
+class MultiFaceAnalysisResponse(BaseModel):
+    faces: List[FaceAnalysis]
+
+
 class AnalysisAndRecommendationResponse(BaseModel):
     detected_skin_issues: List[str]
     recommended_products: Dict[str, List[ProductResponse]]
@@ -58,6 +82,17 @@ THRESHOLDS = {
 }
 
 
+def apply_thresholds(probs) -> List[str]:
+    # Sigmoid olasılıklarından eşiği geçen etiketleri döner
+    detected = []
+    for i, p in enumerate(probs):
+        label = LABELS[i]
+        threshold = THRESHOLDS.get(label, 0.5)
+        if p > threshold:
+            detected.append(label)
+    return detected
+
+
 # Product recommendation mapping - Updated with healthy
 PRODUCT_KEYWORDS = {
     "acne": ["acne", "sivilce", "akne", "siyah nokta", "cilt lekesi", "blemish"],
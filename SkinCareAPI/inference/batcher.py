@@ -0,0 +1,145 @@
+#batcher.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from inference.executor import ExecutorSaturatedError
+
+
+class BatchScheduler:
+    """Eşzamanlı isteklerin yüz tensörlerini tek forward'da toplar; her çağırana kendi satırını döner."""
+
+    def __init__(self, forward: Callable[[torch.Tensor], np.ndarray],
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 run_blocking: Optional[Callable[..., Awaitable]] = None,
+                 max_concurrent_batches: int = 1, max_queue_size: int = 0):
+        self.forward = forward
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        # Forward'ı çalıştıracak coroutine (ör. InferenceExecutor.inference.run)
+        self.run_blocking = run_blocking
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.max_queue_size = max(0, max_queue_size)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batch_tasks = set()
+        # Toplanmakta olan (henüz forward'a verilmemiş) batch
+        self._collecting: List[Tuple[torch.Tensor, asyncio.Future]] = []
+
+        # Basit sayaçlar (ortalama batch boyutunu görmek için)
+        self.batches_run = 0
+        self.items_run = 0
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        # Çalışan batch'ler bitsin; kuyrukta kalanlar sonsuza kadar beklemesin
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        waiting = self._collecting
+        self._collecting = []
+        while self._queue is not None and not self._queue.empty():
+            waiting.append(self._queue.get_nowait())
+        for _, future in waiting:
+            if not future.done():
+                future.set_exception(ExecutorSaturatedError("batch scheduler stopped"))
+
+    async def submit(self, tensor: torch.Tensor, wait: bool = False) -> np.ndarray:
+        """Tek bir (3, H, W) tensörü kuyruğa ekler ve bu tensöre ait olasılık satırını döner."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        if wait:
+            # Kuyruk doluysa reddetmek yerine yer açılmasını bekle (toplu analiz)
+            await self._queue.put((tensor, future))
+            return await future
+        try:
+            self._queue.put_nowait((tensor, future))
+        except asyncio.QueueFull:
+            raise ExecutorSaturatedError("batch queue is full")
+        return await future
+
+    def queue_size(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _collect(self) -> List[Tuple[torch.Tensor, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = self._collecting = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Kuyrukta bekleyen varsa beklemeden al
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Boş bir forward slotu olana kadar yeni istekler kuyrukta birikir
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            self._collecting = []
+            # İstemcisi bağlantıyı kapatmış istekleri atla
+            batch = [(tensor, future) for tensor, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[torch.Tensor, asyncio.Future]]):
+        try:
+            await self._forward_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _forward_batch(self, batch: List[Tuple[torch.Tensor, asyncio.Future]]):
+        try:
+            inputs = torch.stack([tensor for tensor, _ in batch])
+            # Forward pass sırasında event loop bir sonraki batch'i toplamaya devam eder
+            if self.run_blocking is not None:
+                probs = await self.run_blocking(self.forward, inputs)
+            else:
+                probs = await asyncio.get_running_loop().run_in_executor(None, self.forward, inputs)
+        except Exception as e:
+            logging.error(f"Batched inference error: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.items_run += len(batch)
+
+        for row, (_, future) in zip(probs, batch):
+            if not future.done():
+                future.set_result(row)
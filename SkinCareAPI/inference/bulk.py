@@ -0,0 +1,119 @@
+#bulk.py
+import asyncio
+import json
+import logging
+import tempfile
+import zipfile
+import zlib
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import UploadFile
+
+from inference.uploads import IMAGE_EXTENSIONS
+
+# (dosya adı, dosya nesnesi)
+BulkSource = Tuple[str, object]
+
+# Bozuk/şifreli arşiv veya CRC hatalı üye: sadece o girdi hatalı sayılır
+ARCHIVE_ERRORS = (zipfile.BadZipFile, zlib.error, NotImplementedError, RuntimeError, OSError)
+
+
+class BulkReadError(Exception):
+    """Toplu yüklemedeki bir dosya/arşiv üyesi okunamadığında, görsel baytları yerine döner."""
+
+
+def detach_upload(upload: UploadFile) -> BulkSource:
+    """UploadFile'ın altındaki geçici dosyayı sahiplenir; kapatmak çağıranın işidir."""
+    # FastAPI form dosyalarını endpoint dönünce kapatır, StreamingResponse ise gövdeyi sonra üretir
+    fileobj = upload.file
+    upload.file = tempfile.SpooledTemporaryFile()
+    return upload.filename or "", fileobj
+
+
+def is_zip(filename: str, fileobj) -> bool:
+    if filename.lower().endswith(".zip"):
+        return True
+    try:
+        position = fileobj.tell()
+        result = zipfile.is_zipfile(fileobj)
+        fileobj.seek(position)
+        return result
+    except Exception:
+        return False
+
+
+def iter_bulk_images(sources: List[BulkSource],
+                     max_bytes: int) -> Iterator[Tuple[str, Union[bytes, BulkReadError]]]:
+    """Yüklenen dosyaları ve zip arşivlerinin içindeki görselleri tek tek, en fazla `max_bytes + 1` bayt okur."""
+    for filename, fileobj in sources:
+        archive = None
+        try:
+            fileobj.seek(0)
+            if is_zip(filename, fileobj):
+                archive = zipfile.ZipFile(fileobj)
+            else:
+                data = fileobj.read(max_bytes + 1)
+        except ARCHIVE_ERRORS as e:
+            logging.warning(f"Bulk upload {filename} could not be read: {e}")
+            yield filename, BulkReadError(f"Dosya okunamadı: {e}")
+            continue
+
+        if archive is None:
+            yield filename, data
+            continue
+
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                name = f"{filename}/{info.filename}"
+                try:
+                    with archive.open(info) as member:
+                        data = member.read(max_bytes + 1)
+                except ARCHIVE_ERRORS as e:
+                    logging.warning(f"Bulk archive member {name} could not be read: {e}")
+                    yield name, BulkReadError(f"Arşiv üyesi okunamadı: {e}")
+                    continue
+                yield name, data
+
+
+async def stream_ndjson(images: Iterator[Tuple[str, Union[bytes, BulkReadError]]],
+                        analyze: Callable[[int, str, bytes], Awaitable[Dict]],
+                        max_in_flight: int = 8,
+                        on_close: Optional[Callable[[], None]] = None):
+    """Görselleri sınırlı sayıda eşzamanlı görevle işler, biten her sonucu hemen NDJSON satırı olarak verir."""
+    pending = set()
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                # Dosya/zip okuma bloklayıcı olduğu için thread'de yapılır
+                item = await asyncio.to_thread(next, images, None)
+                if item is None:
+                    exhausted = True
+                    break
+                filename, image_bytes = item
+                if isinstance(image_bytes, BulkReadError):
+                    # Okunamayan girdi analiz edilmez; satırı hemen yazılır, akış devam eder
+                    yield json.dumps({"index": index, "filename": filename, "status_code": 400,
+                                      "error": str(image_bytes)}, ensure_ascii=False) + "\n"
+                    index += 1
+                    continue
+                pending.add(asyncio.ensure_future(analyze(index, filename, image_bytes)))
+                index += 1
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield json.dumps(task.result(), ensure_ascii=False) + "\n"
+    except Exception as e:
+        logging.error(f"Bulk analysis error: {e}")
+        yield json.dumps({"error": f"Toplu analiz hatası: {e}"}, ensure_ascii=False) + "\n"
+    finally:
+        for task in pending:
+            task.cancel()
+        if on_close is not None:
+            on_close()
@@ -0,0 +1,242 @@
+#engines.py
+# Birbirinin yerine kullanılabilen inference motorları.
+# Her motorun bir export adımı (eager modelden artifact üretir), bir load adımı ve
+# eager logit'lerine karşı bir parity kontrolü vardır.
+#
+#   python -m inference.engines export --engine onnx --artifact 75epoch-convnextbase.onnx
+#   python -m inference.engines check --engine onnx --artifact 75epoch-convnextbase.onnx
+import argparse
+import logging
+import os
+import time
+from typing import Dict, Optional, Type
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from inference.model import load_model
+from inference.quantization import load_quantized, quantize_dynamic_int8
+
+EXAMPLE_SHAPE = (1, 3, 224, 224)
+
+
+class InferenceEngine:
+    """Ortak arayüz: (N, 3, 224, 224) float32 batch alır, (N, len(LABELS)) logit döner."""
+
+    name = "base"
+    # Artifact yolu verilmezse kullanılacak uzantı (ağırlık dosyasının yanına yazılır).
+    # None: motor doğrudan .pth ağırlıklarını yükler, export edilecek bir şey yoktur.
+    artifact_suffix: Optional[str] = None
+
+    def __init__(self, device: torch.device):
+        self.device = device
+
+    @classmethod
+    def default_artifact(cls, weights_path: str) -> str:
+        if cls.artifact_suffix is None:
+            return weights_path
+        return weights_path.rsplit(".", 1)[0] + cls.artifact_suffix
+
+    @classmethod
+    def export(cls, model: nn.Module, path: str):
+        """Eager modelden bu motorun yükleyeceği artifact'i üretir."""
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, artifact_path: str, device: torch.device) -> "InferenceEngine":
+        raise NotImplementedError
+
+    def logits(self, batch: torch.Tensor) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict(self, batch: torch.Tensor) -> np.ndarray:
+        # Sigmoid olasılıkları
+        return 1.0 / (1.0 + np.exp(-self.logits(batch)))
+
+
+class TorchModuleEngine(InferenceEngine):
+    """nn.Module / ScriptModule çalıştıran motorlar için ortak forward."""
+
+    def __init__(self, module, device: torch.device):
+        super().__init__(device)
+        self.module = module
+
+    def logits(self, batch: torch.Tensor) -> np.ndarray:
+        with torch.no_grad():
+            return self.module(batch.to(self.device)).float().cpu().numpy()
+
+
+class EagerEngine(TorchModuleEngine):
+    name = "eager"
+
+    @classmethod
+    def load(cls, artifact_path, device):
+        return cls(load_model(artifact_path, device), device)
+
+
+class TorchScriptEngine(TorchModuleEngine):
+    name = "torchscript"
+    artifact_suffix = ".ts"
+
+    @classmethod
+    def export(cls, model: nn.Module, path: str):
+        model = model.cpu().eval()
+        with torch.no_grad():
+            scripted = torch.jit.trace(model, torch.zeros(EXAMPLE_SHAPE))
+        torch.jit.save(torch.jit.freeze(scripted), path)
+
+    @classmethod
+    def load(cls, artifact_path, device):
+        module = torch.jit.load(artifact_path, map_location=device)
+        module = torch.jit.optimize_for_inference(module.eval())
+        return cls(module, device)
+
+
+class CompiledEngine(TorchModuleEngine):
+    """torch.compile; artifact gerekmez, derleme ilk forward'da (warmup) yapılır."""
+
+    name = "compile"
+
+    @classmethod
+    def load(cls, artifact_path, device):
+        return cls(torch.compile(load_model(artifact_path, device)), device)
+
+
+class DynamicInt8Engine(TorchModuleEngine):
+    name = "dynamic_int8"
+
+    @classmethod
+    def load(cls, artifact_path, device):
+        cpu = torch.device("cpu")
+        return cls(quantize_dynamic_int8(load_model(artifact_path, cpu)), cpu)
+
+
+class StaticInt8Engine(TorchModuleEngine):
+    """inference/quantization.py ile kalibre edilmiş TorchScript modeli."""
+
+    name = "static_int8"
+    artifact_suffix = "-int8.pt"
+
+    @classmethod
+    def export(cls, model: nn.Module, path: str):
+        raise RuntimeError("Static INT8 export needs calibration data: use python -m inference.quantization")
+
+    @classmethod
+    def load(cls, artifact_path, device):
+        return cls(load_quantized(artifact_path), torch.device("cpu"))
+
+
+class OnnxRuntimeEngine(InferenceEngine):
+    name = "onnx"
+    artifact_suffix = ".onnx"
+
+    def __init__(self, session, device: torch.device):
+        super().__init__(device)
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    @classmethod
+    def export(cls, model: nn.Module, path: str):
+        model = model.cpu().eval()
+        with torch.no_grad():
+            torch.onnx.export(
+                model, torch.zeros(EXAMPLE_SHAPE), path,
+                input_names=["input"], output_names=["logits"],
+                dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+                opset_version=17,
+            )
+
+    @classmethod
+    def load(cls, artifact_path, device):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("onnxruntime is not installed: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        session = ort.InferenceSession(artifact_path, options, providers=["CPUExecutionProvider"])
+        return cls(session, torch.device("cpu"))
+
+    def logits(self, batch: torch.Tensor) -> np.ndarray:
+        inputs = np.ascontiguousarray(batch.cpu().numpy(), dtype=np.float32)
+        return self.session.run(None, {self.input_name: inputs})[0]
+
+
+ENGINES: Dict[str, Type[InferenceEngine]] = {
+    engine.name: engine
+    for engine in (EagerEngine, TorchScriptEngine, CompiledEngine,
+                   DynamicInt8Engine, StaticInt8Engine, OnnxRuntimeEngine)
+}
+
+
+def create_engine(name: str, weights_path: str, device: torch.device,
+                  artifact_path: Optional[str] = None) -> InferenceEngine:
+    if name not in ENGINES:
+        raise RuntimeError(f"❌ Unknown inference engine: {name}. Options: {sorted(ENGINES)}")
+    engine_cls = ENGINES[name]
+    return engine_cls.load(artifact_path or engine_cls.default_artifact(weights_path), device)
+
+
+def parity_check(engine: InferenceEngine, reference: nn.Module, batch: torch.Tensor,
+                 atol: float = 1e-3) -> Dict[str, float]:
+    """Motor logit'lerini eager referans modelinin logit'leriyle karşılaştırır."""
+    with torch.no_grad():
+        expected = reference(batch.to(next(reference.parameters()).device)).float().cpu().numpy()
+    actual = engine.logits(batch)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    return {
+        "max_abs_diff": max_abs_diff,
+        "mean_abs_diff": float(np.mean(np.abs(expected - actual))),
+        "passed": max_abs_diff <= atol,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference engine export / parity check")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--engine", required=True, choices=sorted(ENGINES))
+    parser.add_argument("--model", default="75epoch-convnextbase.pth")
+    parser.add_argument("--artifact", help="Artifact yolu (varsayılan: ağırlık dosyasının yanında)")
+    parser.add_argument("--atol", type=float, default=1e-3)
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cpu = torch.device("cpu")
+    engine_cls = ENGINES[args.engine]
+    artifact = args.artifact or engine_cls.default_artifact(args.model)
+    if args.command == "export":
+        if engine_cls.artifact_suffix is None:
+            print(f"{args.engine} loads the .pth weights directly; nothing to export")
+            return
+        # Ağırlık dosyasının üzerine yazmak, mmap ile okunan checkpoint'i bozar
+        if os.path.realpath(artifact) == os.path.realpath(args.model):
+            raise SystemExit(f"❌ Artifact path is the weights file itself: {artifact}")
+    reference = load_model(args.model, cpu)
+
+    if args.command == "export":
+        engine_cls.export(reference, artifact)
+        logging.info(f"{args.engine} artifact saved: {artifact}")
+        return
+
+    engine = create_engine(args.engine, args.model, cpu, artifact)
+    batch = torch.randn(args.batch_size, *EXAMPLE_SHAPE[1:])
+    engine.logits(batch)  # warmup (torch.compile burada derlenir)
+
+    start = time.perf_counter()
+    engine.logits(batch)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    result = parity_check(engine, reference, batch, atol=args.atol)
+    logging.info(f"{args.engine}: max|diff|={result['max_abs_diff']:.6f} "
+                 f"mean|diff|={result['mean_abs_diff']:.6f} passed={result['passed']} "
+                 f"forward={elapsed_ms:.0f} ms (batch {args.batch_size})")
+    if not result["passed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#executor.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class ExecutorSaturatedError(Exception):
+    """Aşama kuyruğu dolu olduğunda fırlatılır (istek 503 ile reddedilmeli)."""
+
+
+class StagePool:
+    """Kendi thread pool'u olan işlem aşaması: en fazla workers + queue_depth iş kabul edilir, fazlası reddedilir."""
+
+    def __init__(self, name: str, workers: int, queue_depth: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+
+        self._admitted = 0
+        self._running = 0
+        self._freed: Optional[asyncio.Event] = None
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    async def run(self, fn: Callable, *args):
+        if self._admitted >= self.capacity:
+            self.rejected += 1
+            raise ExecutorSaturatedError(f"{self.name} queue is full")
+
+        self._admitted += 1
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.pool, self._call, fn, args)
+        finally:
+            self._admitted -= 1
+            self.completed += 1
+            if self._freed is not None:
+                self._freed.set()
+                self._freed = None
+
+    async def run_when_free(self, fn: Callable, *args):
+        # Reddedilmek yerine boş bir worker bekler (toplu analiz); kuyruk interaktif isteklere kalır
+        while self._admitted >= self.workers:
+            if self._freed is None:
+                self._freed = asyncio.Event()
+            freed = self._freed
+            self.waiting += 1
+            try:
+                await freed.wait()
+            finally:
+                self.waiting -= 1
+        return await self.run(fn, *args)
+
+    def _call(self, fn: Callable, args):
+        self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            self._running -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "running": self._running,
+            "queued": max(0, self._admitted - self._running),
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+
+class InferenceExecutor:
+    """Event loop dışında çalışan iki aşama: görüntü çözme/yüz kırpma ve model forward'ı."""
+
+    def __init__(self, preprocess_workers: int = 4, preprocess_queue_depth: int = 32,
+                 inference_workers: int = 1, inference_queue_depth: int = 64):
+        self.preprocess = StagePool("preprocess", preprocess_workers, preprocess_queue_depth)
+        self.inference = StagePool("inference", inference_workers, inference_queue_depth)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "preprocess": self.preprocess.stats(),
+            "inference": self.inference.stats(),
+        }
+
+    def shutdown(self):
+        self.preprocess.shutdown()
+        self.inference.shutdown()
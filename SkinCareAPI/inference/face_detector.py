@@ -0,0 +1,128 @@
+#face_detector.py
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from inference.preprocessing import decode_reduced
+from monitoring.metrics import stage_timer
+
+Box = Tuple[int, int, int, int]  # x, y, w, h (tam çözünürlükte)
+
+DEFAULT_CASCADE = "haarcascade_frontalface_default.xml"
+
+
+class FaceDetector:
+    """
+    Haar cascade yüz dedektörü. Cascade her thread'de bir kez yüklenir (thread'ler arası
+    paylaşılamaz); tespit küçültülmüş kopyada yapılır, kutular tam çözünürlüğe çevrilir.
+    """
+
+    # Haar cascade'in eğitildiği en küçük pencere
+    MIN_WINDOW = 24
+
+    def __init__(self, cascade_file: str = DEFAULT_CASCADE, detection_max_side: int = 640,
+                 scale_factor: float = 1.1, min_neighbors: int = 4, min_size: Tuple[int, int] = (60, 60)):
+        self.cascade_path = cascade_file if "/" in cascade_file else cv2.data.haarcascades + cascade_file
+        self.detection_max_side = detection_max_side
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # DataLoader worker süreçlerine gönderilebilsin; cascade'ler her süreçte yeniden yüklenir
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _cascade(self) -> cv2.CascadeClassifier:
+        cascades: Dict[str, cv2.CascadeClassifier] = getattr(self._local, "cascades", None)
+        if cascades is None:
+            cascades = self._local.cascades = {}
+
+        cascade = cascades.get(self.cascade_path)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(self.cascade_path)
+            if cascade.empty():
+                raise RuntimeError(f"Could not load cascade: {self.cascade_path}")
+            cascades[self.cascade_path] = cascade
+        return cascade
+
+    def _detection_scale(self, height: int, width: int) -> float:
+        longest = max(height, width)
+        if self.detection_max_side <= 0 or longest <= self.detection_max_side:
+            return 1.0
+        return self.detection_max_side / longest
+
+    def detect(self, img: np.ndarray, min_size: Optional[Tuple[int, int]] = None) -> List[Box]:
+        """BGR görüntüdeki yüz kutularını tam çözünürlük koordinatlarında döner."""
+        height, width = img.shape[:2]
+        scale = self._detection_scale(height, width)
+        min_w, min_h = min_size or self.min_size
+
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if scale < 1.0:
+            small_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            gray = cv2.resize(gray, small_size, interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(gray)
+
+        faces = self._cascade().detectMultiScale(
+            image=gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(max(self.MIN_WINDOW, round(min_w * scale)), max(self.MIN_WINDOW, round(min_h * scale))),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+
+        boxes = []
+        for (x, y, w, h) in faces:
+            # Küçültülmüş koordinatları orijinal görüntüye geri ölçekle
+            x0 = max(0, int(round(x / scale)))
+            y0 = max(0, int(round(y / scale)))
+            x1 = min(width, int(round((x + w) / scale)))
+            y1 = min(height, int(round((y + h) / scale)))
+            if x1 > x0 and y1 > y0:
+                boxes.append((x0, y0, x1 - x0, y1 - y0))
+        return boxes
+
+    def detect_first(self, img: np.ndarray) -> Optional[Box]:
+        boxes = self.detect(img)
+        return boxes[0] if boxes else None
+
+
+def detect_first_face(image_bytes: bytes, detector: FaceDetector,
+                      min_side: int = 0) -> Optional[Tuple[np.ndarray, int]]:
+    """İlk yüzün BGR kırpıntısını (kopyasız görünüm) ve decode küçültme oranını döner."""
+    try:
+        with stage_timer("decode"):
+            img, factor = decode_reduced(image_bytes, min_side=min_side)
+
+        if img is None:
+            return None
+
+        with stage_timer("face_detection"):
+            box = detector.detect_first(img)
+
+        if box is None:
+            logging.warning("No face detected.")
+            return None
+
+        # İlk yüzü kırp (kopyasız, BGR görünüm)
+        x, y, w, h = box
+        return img[y:y + h, x:x + w], factor
+
+    except Exception as e:
+        logging.error(f"Face extraction error: {str(e)}")
+        return None
+
+
+def crop_first_face(image_bytes: bytes, detector: FaceDetector, min_side: int = 0) -> Optional[np.ndarray]:
+    found = detect_first_face(image_bytes, detector, min_side=min_side)
+    return found[0] if found is not None else None
@@ -0,0 +1,48 @@
+#model.py
+import os
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from data.skin_issues import LABELS
+
+
+# Öğretmen: convnext_base. Distillation ile eğitilen küçük öğrenciler de aynı 6 etiketi
+# ve THRESHOLDS değerlerini kullanır (skinanalysismodel.py --mode distill)
+ARCHITECTURES = {
+    "convnext_base": models.convnext_base,
+    "convnext_tiny": models.convnext_tiny,
+    "mobilenet_v3_large": models.mobilenet_v3_large,
+    "efficientnet_b0": models.efficientnet_b0,
+}
+
+MODEL_ARCH = os.getenv("MODEL_ARCH", "convnext_base")
+
+
+def build_model(arch: str = MODEL_ARCH) -> nn.Module:
+    # Son Linear katman 6 etikete göre değiştirildi (skinanalysismodel.py ile aynı)
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"Unknown model architecture '{arch}'. Options: {', '.join(ARCHITECTURES)}")
+    model = ARCHITECTURES[arch](weights=None)
+    model.classifier[-1] = nn.Linear(model.classifier[-1].in_features, len(LABELS))
+    return model
+
+
+def load_state_dict(model_path: str, device: torch.device):
+    """Ağırlıkları kopyalamadan (mmap ile, sayfalar ihtiyaç oldukça okunur) yükler."""
+    if model_path.endswith(".safetensors"):
+        from safetensors.torch import load_file
+        return load_file(model_path, device=str(device))
+    return torch.load(model_path, map_location=device, mmap=True, weights_only=True)
+
+
+def load_model(model_path: str, device: torch.device, arch: str = MODEL_ARCH) -> nn.Module:
+    # Parametreler "meta" cihazda oluşturulur: rastgele başlatma yapılmaz,
+    # load_state_dict(assign=True) yüklenen tensörleri doğrudan modele bağlar
+    with torch.device("meta"):
+        model = build_model(arch)
+    model.load_state_dict(load_state_dict(model_path, device), assign=True)
+    model.to(device)
+    model.eval()
+    return model
@@ -0,0 +1,79 @@
+#model_loader.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import torch
+
+from inference.engines import InferenceEngine
+
+
+class ModelNotReadyError(Exception):
+    """Model henüz yüklenmediğinde (veya yükleme başarısız olduğunda) fırlatılır."""
+
+
+class ModelLoader:
+    """Inference motorunu arka planda yükler ve ısıtır; hazır olana kadar analiz 503 döner."""
+
+    def __init__(self, factory: Callable[[], InferenceEngine], warmup_batch_size: int = 1):
+        self.factory = factory
+        self.warmup_batch_size = warmup_batch_size
+
+        self.state = "idle"  # idle -> loading -> ready | failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._engine: Optional[InferenceEngine] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def engine(self) -> InferenceEngine:
+        if self._engine is None or not self.ready:
+            raise ModelNotReadyError(f"model is {self.state}")
+        return self._engine
+
+    def start_background(self):
+        with self._lock:
+            if self.state != "idle":
+                return
+            self.state = "loading"
+        self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def load(self, warmup: bool = True):
+        """Senkron yükleme (ör. worker'lar fork edilmeden önce); warmup=False ise forward çalıştırılmaz."""
+        with self._lock:
+            if self.state not in ("idle", "failed"):
+                return
+            self.state = "loading"
+        self._load(warmup)
+
+    def warmup(self, engine: Optional[InferenceEngine] = None):
+        # İlk forward'daki tembel başlatmalar (ve torch.compile) burada ödenir
+        engine = engine or self.engine
+        engine.predict(torch.zeros(self.warmup_batch_size, 3, 224, 224))
+
+    def _load(self, warmup: bool = True):
+        start = time.perf_counter()
+        try:
+            engine = self.factory()
+            if warmup:
+                self.warmup(engine)
+        except Exception as e:
+            logging.error(f"Model loading failed: {e}")
+            self.error = str(e)
+            self.state = "failed"
+            return
+
+        self._engine = engine
+        self.load_seconds = time.perf_counter() - start
+        self.state = "ready"
+        logging.info(f"Model ready in {self.load_seconds:.1f}s")
+
+    def status(self) -> Dict[str, object]:
+        return {"state": self.state, "error": self.error, "load_seconds": self.load_seconds}
@@ -0,0 +1,105 @@
+#preprocessing.py
+import io
+import logging
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Eğitimdeki transform ile aynı değerler (Resize(256) -> CenterCrop(224) -> Normalize)
+RESIZE_SIZE = 256
+CROP_SIZE = 224
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# ToTensor (/255) ve Normalize tek bir çarpma + çıkarma olarak uygulanır
+_SCALE = (1.0 / (255.0 * STD)).astype(np.float32)
+_SHIFT = (MEAN / STD).astype(np.float32)
+
+# libjpeg DCT ölçekleme ile doğrudan küçük çözülebilen oranlar
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def image_size(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """Sadece başlığı okuyarak (genişlik, yükseklik) döner; tam decode yapmaz."""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def reduction_factor(width: int, height: int, min_side: int) -> int:
+    """Kısa kenar `min_side` altına düşmeden kullanılabilecek en büyük küçültme oranı."""
+    if min_side <= 0:
+        return 1
+    for factor, _ in _REDUCED_FLAGS:
+        if min(width, height) // factor >= min_side:
+            return factor
+    return 1
+
+
+def decode_reduced(image_bytes: bytes, min_side: int = 0) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Görseli BGR olarak çözer ve uygulanan küçültme oranını da döner.
+    min_side > 0 ise büyük fotoğraflar 1/2, 1/4 ya da 1/8 çözünürlükte çözülür (kısa kenar
+    min_side altına düşmez). Bu, eğitimdeki tam çözünürlüklü yoldan farklı piksel üretir;
+    parity için benchmarks/preprocessing.py ile ölçülmeden açılmamalı.
+    Koordinatlar * factor = orijinal pikseller.
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    flags = cv2.IMREAD_COLOR
+    factor = 1
+
+    size = image_size(image_bytes)
+    if size is not None:
+        factor = reduction_factor(size[0], size[1], min_side)
+        for candidate, reduced_flag in _REDUCED_FLAGS:
+            if candidate == factor:
+                flags = reduced_flag
+                break
+
+    img = cv2.imdecode(nparr, flags)
+    if img is None:
+        logging.error("Invalid image format")
+    return img, factor
+
+
+def decode_image(image_bytes: bytes, min_side: int = 0) -> Optional[np.ndarray]:
+    return decode_reduced(image_bytes, min_side)[0]
+
+
+def resized_shape(width: int, height: int, size: int = RESIZE_SIZE) -> Tuple[int, int]:
+    # torchvision.transforms.Resize(int) ile aynı hesap: kısa kenar `size` olur
+    if width <= height:
+        return size, int(size * height / width)
+    return int(size * width / height), size
+
+
+def face_to_tensor(face_bgr: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """BGR yüz kırpıntısını eğitimdeki transform ile aynı (3, 224, 224) float32 normalize tensöre çevirir."""
+    if out is None:
+        out = np.empty((3, CROP_SIZE, CROP_SIZE), dtype=np.float32)
+
+    height, width = face_bgr.shape[:2]
+    new_w, new_h = resized_shape(width, height)
+    # cv2 INTER_AREA/INTER_LINEAR eğitimdeki PIL filtresinden birkaç gri seviye sapıyor;
+    # yüksek eşikler (THRESHOLDS) buna duyarlı olduğu için PIL kullanılır
+    face_rgb = Image.fromarray(cv2.cvtColor(face_bgr, cv2.COLOR_BGR2RGB))
+    resized = np.asarray(face_rgb.resize((new_w, new_h), Image.BILINEAR))
+
+    # CenterCrop(224) - torchvision ile aynı yuvarlama
+    top = int(round((new_h - CROP_SIZE) / 2.0))
+    left = int(round((new_w - CROP_SIZE) / 2.0))
+    crop = resized[top:top + CROP_SIZE, left:left + CROP_SIZE]
+
+    # HWC -> CHW ve normalize tek geçişte
+    for c in range(3):
+        np.multiply(crop[:, :, c], _SCALE[c], out=out[c], casting="unsafe")
+        out[c] -= _SHIFT[c]
+    return out
@@ -0,0 +1,99 @@
+#quality.py
+import threading
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+
+class QualityResult(NamedTuple):
+    passed: bool
+    code: Optional[str]  # ret nedeni (ör. "image_too_blurry"), geçtiyse None
+    message: Optional[str]
+    metrics: Dict[str, float]
+
+
+class QualityGateError(Exception):
+    """Yüz kırpıntısı kalite kontrolünden geçemediğinde fırlatılır."""
+
+    def __init__(self, result: QualityResult):
+        super().__init__(result.message)
+        self.result = result
+
+
+class QualityGate:
+    """Model öncesi ucuz kalite kontrolü: bulanıklık, pozlama ve yüz boyutu."""
+
+    # Metrikler bu boyuta küçültülmüş gri kopya üzerinde hesaplanır
+    ANALYSIS_SIZE = 256
+
+    def __init__(self, min_face_size: int = 80, min_sharpness: float = 25.0,
+                 min_brightness: float = 40.0, max_brightness: float = 220.0,
+                 max_clipped_fraction: float = 0.4, enabled: bool = True):
+        self.min_face_size = min_face_size
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_clipped_fraction = max_clipped_fraction
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def measure(self, face_bgr: np.ndarray) -> Dict[str, float]:
+        height, width = face_bgr.shape[:2]
+        gray = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2GRAY)
+        if max(height, width) > self.ANALYSIS_SIZE:
+            scale = self.ANALYSIS_SIZE / max(height, width)
+            gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+
+        clipped = np.count_nonzero((gray <= 5) | (gray >= 250)) / gray.size
+        return {
+            "face_size": float(min(height, width)),
+            # Laplacian varyansı: düşük değer = az kenar = bulanık
+            "sharpness": float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+            "brightness": float(gray.mean()),
+            "clipped_fraction": float(clipped),
+        }
+
+    def check(self, face_bgr: np.ndarray, face_size: Optional[float] = None) -> QualityResult:
+        """`face_size`: yüzün orijinal görseldeki kısa kenarı (küçültülmüş decode'da kırpıntıdan büyüktür)."""
+        if not self.enabled:
+            return QualityResult(True, None, None, {})
+
+        metrics = self.measure(face_bgr)
+        if face_size is not None:
+            metrics["face_size"] = float(face_size)
+
+        if metrics["face_size"] < self.min_face_size:
+            result = QualityResult(False, "face_too_small", "Yüz çok küçük, lütfen daha yakından çekin.", metrics)
+        elif metrics["brightness"] < self.min_brightness:
+            result = QualityResult(False, "image_too_dark", "Fotoğraf çok karanlık, lütfen daha aydınlık bir ortamda çekin.", metrics)
+        elif metrics["brightness"] > self.max_brightness or metrics["clipped_fraction"] > self.max_clipped_fraction:
+            result = QualityResult(False, "image_overexposed", "Fotoğraf aşırı pozlanmış, lütfen doğrudan ışıktan kaçının.", metrics)
+        elif metrics["sharpness"] < self.min_sharpness:
+            result = QualityResult(False, "image_too_blurry", "Fotoğraf bulanık, lütfen sabit tutarak tekrar çekin.", metrics)
+        else:
+            result = QualityResult(True, None, None, metrics)
+
+        with self._lock:
+            self.counters["passed" if result.passed else "failed"] += 1
+            if not result.passed:
+                self.counters[result.code] += 1
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "thresholds": {
+                    "min_face_size": self.min_face_size,
+                    "min_sharpness": self.min_sharpness,
+                    "min_brightness": self.min_brightness,
+                    "max_brightness": self.max_brightness,
+                    "max_clipped_fraction": self.max_clipped_fraction,
+                },
+                "counters": dict(self.counters),
+            }
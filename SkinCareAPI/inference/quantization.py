@@ -0,0 +1,172 @@
+#quantization.py
+# INT8 CPU inference için ConvNeXt-base modelini quantize eder.
+#
+# Statik quantization (kalibrasyon ile) TorchScript dosyası üretir:
+#   python -m inference.quantization --mode static --calibration-dir faces/ \
+#       --eval-dir faces_test/ --output 75epoch-convnextbase-int8.pt
+# Dinamik quantization için dosya gerekmez; INFERENCE_BACKEND=dynamic_int8 yeterlidir.
+import argparse
+import logging
+import os
+import time
+from typing import Dict, Iterable, List
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from data.skin_issues import LABELS, THRESHOLDS
+from inference.preprocessing import decode_image, face_to_tensor
+from inference.uploads import IMAGE_EXTENSIONS
+
+
+def _select_engine():
+    # x86 (fbgemm'in yeni adı) yoksa fbgemm, o da yoksa qnnpack (ARM)
+    supported = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in supported:
+            torch.backends.quantized.engine = engine
+            return engine
+    raise RuntimeError(f"No quantized engine available: {supported}")
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    """Linear katmanlarının ağırlıklarını INT8'e çevirir; aktivasyonlar çalışma anında quantize edilir."""
+    _select_engine()
+    model = model.cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static_int8(model: nn.Module, calibration_batches: Iterable[torch.Tensor]) -> nn.Module:
+    """FX graph mode statik quantization; INT8 kernel'i olmayan katmanlar (LayerNorm, GELU) fp32 kalır."""
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    engine = _select_engine()
+    model = model.cpu().eval()
+    example = torch.zeros(1, 3, 224, 224)
+
+    prepared = prepare_fx(model, get_default_qconfig_mapping(engine), example_inputs=(example,))
+    with torch.no_grad():
+        for batch in calibration_batches:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def save_quantized(model: nn.Module, path: str):
+    # Quantize edilmiş FX modeli, mimari kodu olmadan yüklenebilsin diye TorchScript olarak kaydedilir
+    scripted = torch.jit.trace(model, torch.zeros(1, 3, 224, 224))
+    torch.jit.save(scripted, path)
+
+
+def load_quantized(path: str) -> nn.Module:
+    _select_engine()
+    model = torch.jit.load(path, map_location="cpu")
+    model.eval()
+    return model
+
+
+def load_face_batches(folder: str, batch_size: int = 16, limit: int = 0) -> List[torch.Tensor]:
+    """Klasördeki (önceden kırpılmış) yüz görsellerini modele hazır batch'lere çevirir."""
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if limit > 0:
+        files = files[:limit]
+
+    batches = []
+    buffer = np.empty((batch_size, 3, 224, 224), dtype=np.float32)
+    count = 0
+    for filename in files:
+        with open(os.path.join(folder, filename), "rb") as f:
+            img = decode_image(f.read())
+        if img is None:
+            continue
+        face_to_tensor(img, out=buffer[count])
+        count += 1
+        if count == batch_size:
+            batches.append(torch.from_numpy(buffer.copy()))
+            count = 0
+    if count:
+        batches.append(torch.from_numpy(buffer[:count].copy()))
+    return batches
+
+
+def predict_probs(model: nn.Module, batches: Iterable[torch.Tensor]) -> np.ndarray:
+    with torch.no_grad():
+        return np.concatenate([torch.sigmoid(model(batch)).numpy() for batch in batches])
+
+
+def parity_report(reference_probs: np.ndarray, candidate_probs: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """fp32 ve quantize model kararlarını THRESHOLDS üzerinden etiket bazında karşılaştırır."""
+    report = {}
+    for i, label in enumerate(LABELS):
+        threshold = THRESHOLDS.get(label, 0.5)
+        ref = reference_probs[:, i] > threshold
+        cand = candidate_probs[:, i] > threshold
+        report[label] = {
+            "threshold": threshold,
+            "agreement": float(np.mean(ref == cand)) if len(ref) else 1.0,
+            "flips": int(np.sum(ref != cand)),
+            "max_abs_diff": float(np.max(np.abs(reference_probs[:, i] - candidate_probs[:, i]))) if len(ref) else 0.0,
+        }
+
+    ref_sets = reference_probs > np.array([THRESHOLDS.get(label, 0.5) for label in LABELS])
+    cand_sets = candidate_probs > np.array([THRESHOLDS.get(label, 0.5) for label in LABELS])
+    report["all_labels"] = {
+        "exact_match": float(np.mean(np.all(ref_sets == cand_sets, axis=1))) if len(ref_sets) else 1.0,
+    }
+    return report
+
+
+def print_parity_report(report: Dict[str, Dict[str, float]]):
+    print(f"{'label':<14}{'threshold':>10}{'agreement':>11}{'flips':>7}{'max|dp|':>10}")
+    for label in LABELS:
+        row = report[label]
+        print(f"{label:<14}{row['threshold']:>10.4f}{row['agreement']:>11.2%}{row['flips']:>7}{row['max_abs_diff']:>10.4f}")
+    print(f"\nAynı etiket kümesi (tüm etiketler): {report['all_labels']['exact_match']:.2%}")
+
+
+def mean_latency_ms(model: nn.Module, iterations: int = 10) -> float:
+    example = torch.zeros(1, 3, 224, 224)
+    with torch.no_grad():
+        model(example)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            model(example)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    from inference.model import load_model
+
+    parser = argparse.ArgumentParser(description="ConvNeXt INT8 quantization + parity report")
+    parser.add_argument("--model", default="75epoch-convnextbase.pth")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="static")
+    parser.add_argument("--calibration-dir", help="Statik mod için kırpılmış yüz görselleri")
+    parser.add_argument("--calibration-limit", type=int, default=256)
+    parser.add_argument("--eval-dir", required=True, help="Parity raporu için yüz görselleri")
+    parser.add_argument("--output", default="75epoch-convnextbase-int8.pt")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    fp32_model = load_model(args.model, torch.device("cpu"))
+
+    if args.mode == "static":
+        if not args.calibration_dir:
+            parser.error("--calibration-dir is required for static quantization")
+        calibration = load_face_batches(args.calibration_dir, limit=args.calibration_limit)
+        logging.info(f"Calibrating on {sum(len(b) for b in calibration)} face crops")
+        quantized = quantize_static_int8(load_model(args.model, torch.device("cpu")), calibration)
+        save_quantized(quantized, args.output)
+        logging.info(f"Quantized model saved: {args.output}")
+    else:
+        quantized = quantize_dynamic_int8(load_model(args.model, torch.device("cpu")))
+
+    eval_batches = load_face_batches(args.eval_dir)
+    report = parity_report(predict_probs(fp32_model, eval_batches), predict_probs(quantized, eval_batches))
+    print_parity_report(report)
+    print(f"\nfp32 latency: {mean_latency_ms(fp32_model):.1f} ms/img, "
+          f"int8 ({args.mode}) latency: {mean_latency_ms(quantized):.1f} ms/img")
+
+
+if __name__ == "__main__":
+    main()
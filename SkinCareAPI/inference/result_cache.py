@@ -0,0 +1,71 @@
+#result_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+
+class CachedAnalysis(NamedTuple):
+    probs: np.ndarray
+    detected: List[str]
+    timestamp: float
+
+
+class ResultCache:
+    """Görsel baytlarının hash'ine göre analiz sonucu önbelleği (LRU + TTL)."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(image_bytes: bytes) -> str:
+        # blake2b sha256'dan hızlıdır; büyük görsellerde event loop dışında çağrılmalı
+        return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedAnalysis]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry.timestamp >= self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, probs: np.ndarray, detected: List[str]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = CachedAnalysis(np.array(probs, copy=True), list(detected), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,120 @@
+#threads.py
+# Worker başına thread planı.
+# PyTorch (ve OpenCV) varsayılan olarak makinedeki tüm çekirdekleri kullanır; N worker
+# çalışırken her biri tüm çekirdeklere thread açınca CPU aşırı yüklenir. Plan, süreç için
+# gerçekten kullanılabilir CPU'yu (affinity ve cgroup kotası) worker'lara böler.
+#
+# Ortam değişkeniyle elle ayar:
+#   TORCH_INTRA_OP_THREADS, TORCH_INTER_OP_THREADS, CV2_THREADS
+import logging
+import math
+import os
+from typing import NamedTuple, Optional
+
+import cv2
+import torch
+
+
+class ThreadPlan(NamedTuple):
+    cpus: int                      # bu container/süreç için kullanılabilir CPU
+    source: str                    # cpus değerinin nereden geldiği
+    processes: int                 # API worker süreç sayısı
+    intra_op: int                  # torch.set_num_threads
+    inter_op: int                  # torch.set_num_interop_threads
+    cv2_threads: int               # cv2.setNumThreads
+
+
+def affinity_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """cgroup CPU kotası (çekirdek cinsinden) ya da sınır yoksa None."""
+    # cgroup v2: "max 100000" veya "200000 100000"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1: kota -1 ise sınır yok
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return None if quota <= 0 or period <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def uvicorn_workers() -> Optional[int]:
+    """`uvicorn --workers N` ile başlatıldıysak N (ana sürecin komut satırından, Linux)."""
+    try:
+        with open(f"/proc/{os.getppid()}/cmdline", "rb") as f:
+            argv = f.read().decode(errors="replace").split("\0")
+    except OSError:
+        return None
+    if not any("uvicorn" in arg for arg in argv[:3]):
+        return None
+    for i, arg in enumerate(argv):
+        value = None
+        if arg == "--workers" and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+        if value is not None:
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _override(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return max(1, int(value)) if value else None
+
+
+def plan_threads(processes: int = 1, inference_workers: int = 1, preprocess_workers: int = 1) -> ThreadPlan:
+    """Kullanılabilir CPU'yu süreçlere, süreç içinde de eşzamanlı forward'lara böler."""
+    cpus = affinity_cpus()
+    source = "affinity"
+    quota = cgroup_cpu_quota()
+    if quota is not None and math.ceil(quota) < cpus:
+        cpus = max(1, math.ceil(quota))
+        source = f"cgroup quota {quota:g}"
+
+    processes = max(1, processes)
+    per_process = max(1, cpus // processes)
+    if cpus < processes:
+        logging.warning(f"{processes} workers on {cpus} CPUs: workers will share cores")
+
+    return ThreadPlan(
+        cpus=cpus,
+        source=source,
+        processes=processes,
+        intra_op=_override("TORCH_INTRA_OP_THREADS") or max(1, per_process // max(1, inference_workers)),
+        # Model ardışık bir graf; eşzamanlılık zaten batch'lerden ve worker süreçlerinden geliyor
+        inter_op=_override("TORCH_INTER_OP_THREADS") or 1,
+        cv2_threads=_override("CV2_THREADS") or max(1, per_process // max(1, preprocess_workers)),
+    )
+
+
+def apply_thread_plan(plan: ThreadPlan):
+    torch.set_num_threads(plan.intra_op)
+    try:
+        torch.set_num_interop_threads(plan.inter_op)
+    except RuntimeError:
+        # Inter-op havuzu ilk paralel işten sonra değiştirilemez (ör. ikinci çağrı)
+        logging.warning(f"Inter-op threads already started: {torch.get_num_interop_threads()}")
+    cv2.setNumThreads(plan.cv2_threads)
+
+    logging.info(
+        f"Thread plan: {plan.cpus} CPUs ({plan.source}) / {plan.processes} worker(s) -> "
+        f"intra-op={plan.intra_op}, inter-op={plan.inter_op}, cv2={plan.cv2_threads} per worker"
+    )
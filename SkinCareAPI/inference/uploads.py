@@ -0,0 +1,67 @@
+#uploads.py
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+
+from inference.preprocessing import image_size
+
+CHUNK_SIZE = 64 * 1024
+
+# Klasör/arşiv taramalarında görsel sayılan uzantılar (sniff_format'ın tanıdığı formatlar)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# Dosya başındaki sihirli baytlar -> gerçek görsel formatı
+_MAGIC_BYTES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+)
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """content_type başlığına güvenmeden, ilk baytlardan görsel formatını tespit eder."""
+    for magic, name in _MAGIC_BYTES:
+        if head.startswith(magic):
+            return name
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def validate_image_bytes(image_bytes: bytes, max_bytes: int, max_pixels: int) -> str:
+    """Boyut, format ve piksel sayısını tam decode yapmadan (sadece başlıktan) doğrular; formatı döner."""
+    if len(image_bytes) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Dosya çok büyük (en fazla {max_bytes // (1024 * 1024)} MB).")
+
+    image_format = sniff_format(image_bytes[:16])
+    if image_format is None:
+        raise HTTPException(status_code=415, detail="Desteklenmeyen dosya formatı. JPEG, PNG, WEBP veya BMP yükleyin.")
+
+    size = image_size(image_bytes)
+    if size is None:
+        raise HTTPException(status_code=400, detail="Görsel okunamadı.")
+    if size[0] * size[1] > max_pixels:
+        raise HTTPException(status_code=413, detail=f"Görsel çözünürlüğü çok yüksek ({size[0]}x{size[1]}).")
+    return image_format
+
+
+async def read_upload(file: UploadFile, max_bytes: int, max_pixels: int) -> bytes:
+    """Yüklenen dosyayı parça parça, en fazla `max_bytes` kadar okur; görsel olmayanı ilk parçada reddeder."""
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Dosya çok büyük (en fazla {max_bytes // (1024 * 1024)} MB).")
+
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if not buffer and sniff_format(chunk[:16]) is None:
+            raise HTTPException(status_code=415, detail="Desteklenmeyen dosya formatı. JPEG, PNG, WEBP veya BMP yükleyin.")
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Dosya çok büyük (en fazla {max_bytes // (1024 * 1024)} MB).")
+
+    image_bytes = bytes(buffer)
+    validate_image_bytes(image_bytes, max_bytes, max_pixels)
+    return image_bytes
@@ -1,30 +1,47 @@
 #API kodu
 #main.py
-from fastapi import FastAPI, HTTPException, File, UploadFile, Query, Path
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, File, UploadFile, Query, Path, Header, Response
 from typing import List, Optional, Dict
 from dotenv import load_dotenv
 import torch
-import torch.nn as nn
-from torchvision import transforms, models
-from PIL import Image
-import requests
 import logging
 import os
+import asyncio
+from contextlib import contextmanager
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import numpy as np
-import io
 
 #uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+#Çok worker (ağırlıklar paylaşımlı): python serve.py --workers 4
 
 # Import from our modules
-from scrapers.trendyol import extract_trendyol_data, is_product_page, search_products
+from scrapers.http_client import HttpClient
+from scrapers.product_cache import ProductCache
+from catalog.refresher import CatalogRefresher
+from catalog.store import ProductCatalog
+from scrapers.trendyol import SharedPages, search_products
+from inference.batcher import BatchScheduler
+from inference.executor import InferenceExecutor, ExecutorSaturatedError
+from inference.face_detector import FaceDetector, detect_first_face
+from inference.quality import QualityGate, QualityGateError
+from inference.preprocessing import decode_reduced, face_to_tensor
+from inference.engines import create_engine
+from inference.model import MODEL_ARCH
+from inference.model_loader import ModelLoader, ModelNotReadyError
+from inference.threads import apply_thread_plan, plan_threads, uvicorn_workers
+from inference.result_cache import ResultCache
+from inference.bulk import detach_upload, iter_bulk_images, stream_ndjson
+from inference.uploads import read_upload, validate_image_bytes
+from monitoring.profiling import RequestProfiler
+from monitoring.memory import process_memory
+from monitoring.metrics import REGISTRY, BATCH_SIZE, CACHE_REQUESTS, QUALITY_GATE_RESULTS, stage_timer
 
 from data.skin_issues import (
-    LABELS, THRESHOLDS, PRODUCT_KEYWORDS, PRODUCT_TYPES,
+    LABELS, PRODUCT_KEYWORDS, PRODUCT_TYPES, apply_thresholds,
     SKIN_ISSUE_INFO, SkinIssueInfo, ProductResponse, SkinAnalysisResponse,
-    AnalysisAndRecommendationResponse, SkinIssueWithProductsResponse
+    AnalysisAndRecommendationResponse, SkinIssueWithProductsResponse,
+    FaceBox, FaceAnalysis, MultiFaceAnalysisResponse, QualityRejection
 )
 
 # Logging configuration
@@ -35,7 +52,8 @@ load_dotenv("keys.env")
 SEARCH_API_KEY = os.getenv("SEARCH_API_KEY")
 SEARCH_ENGINE_ID = os.getenv("SEARCH_ENGINE_ID")
 if not SEARCH_API_KEY or not SEARCH_ENGINE_ID:
-    raise RuntimeError("❌ API Keys not found.")
+    # Statik endpoint'ler yine de ayağa kalkar; ürün önerisi isteyenler 503 alır
+    logging.warning("❌ API Keys not found. Product recommendations are disabled.")
 
 # FastAPI Application
 app = FastAPI(title="Skincare AI API", description="AI-powered skin analysis and product recommendation API")
@@ -48,150 +66,573 @@ app.add_middleware(
 )
 
 # Model definition
-MODEL_PATH = "75epoch-convnextbase.pth"
+# Öğrenci modeli için: MODEL_PATH=student-mobilenet_v3_large.pth MODEL_ARCH=mobilenet_v3_large
+MODEL_PATH = os.getenv("MODEL_PATH", "75epoch-convnextbase.pth")
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-model = models.convnext_base(weights=None)
-model.classifier[2] = nn.Linear(model.classifier[2].in_features, len(LABELS))
-model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-model.to(device)
-model.eval()
+# Inference engine: eager (varsayılan), torchscript, compile, onnx, dynamic_int8, static_int8
+# INFERENCE_ARTIFACT_PATH verilmezse motorun varsayılan dosyası kullanılır (bkz. inference/engines.py)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager")
+INFERENCE_ARTIFACT_PATH = os.getenv("INFERENCE_ARTIFACT_PATH")
+
+# background: port hemen açılır, ağırlıklar arka planda yüklenir; eager: import sırasında yüklenir
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "background")
+
+
+def build_engine():
+    engine = create_engine(INFERENCE_BACKEND, MODEL_PATH, device, INFERENCE_ARTIFACT_PATH)
+    logging.info(f"Inference backend: {INFERENCE_BACKEND} ({MODEL_ARCH}) on {engine.device}")
+    return engine
+
+
+model_loader = ModelLoader(build_engine)
+
+# Image transformation: eğitimdeki Resize(256) -> CenterCrop(224) -> Normalize adımları
+# inference/preprocessing.py içinde tek geçişte (face_to_tensor) uygulanır.
+# 0: tam çözünürlükte decode (eğitimle birebir aynı tensör). >0 ise görseller kısa kenar bu
+# değerin altına düşmeyecek şekilde küçültülerek çözülür; daha az bellek ama eğitimden farklı
+# pikseller - açmadan önce benchmarks/preprocessing.py --faces ile karar değişimini ölçün
+DECODE_MIN_SIDE = int(os.getenv("DECODE_MIN_SIDE", "0"))
+
+# Dynamic micro-batching (eşzamanlı istekleri tek forward'da birleştirir)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+
+def run_model(batch: torch.Tensor) -> np.ndarray:
+    # (N, 3, 224, 224) -> (N, len(LABELS)) sigmoid olasılıkları
+    engine = model_loader.engine
+    BATCH_SIZE.observe(len(batch))
+    with stage_timer("forward"):
+        return engine.predict(batch)
+
+
+# Executor stage: decode/yüz tespiti ve forward event loop dışında, sınırlı kuyrukla çalışır
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", "4"))
+PREPROCESS_QUEUE_DEPTH = int(os.getenv("PREPROCESS_QUEUE_DEPTH", "32"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "64"))
+
+# CPU'yu worker süreçlerine bölen thread planı; model yüklenmeden önce uygulanır.
+# WEB_CONCURRENCY: bu makinedeki API worker sayısı. serve.py kendisi ayarlar; uvicorn --workers N
+# ayarlamaz, bu durumda N ana sürecin komut satırından okunur ve uyarı verilir (README)
+if os.getenv("WEB_CONCURRENCY"):
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY"))
+else:
+    WEB_CONCURRENCY = uvicorn_workers() or 1
+    if WEB_CONCURRENCY > 1:
+        logging.warning(f"uvicorn --workers {WEB_CONCURRENCY} without WEB_CONCURRENCY: planning threads "
+                        f"for {WEB_CONCURRENCY} workers. Set WEB_CONCURRENCY={WEB_CONCURRENCY} or use serve.py")
+thread_plan = plan_threads(
+    processes=WEB_CONCURRENCY,
+    inference_workers=INFERENCE_WORKERS,
+    preprocess_workers=PREPROCESS_WORKERS,
+)
+apply_thread_plan(thread_plan)
 
-# Image transformation
-transform = transforms.Compose([
-    transforms.Resize(256),
-    transforms.CenterCrop(224),  # Eğitimde böyleydi
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406],
-                         [0.229, 0.224, 0.225])
-])
+if MODEL_LOAD_MODE == "eager":
+    model_loader.load()
 
+executor = InferenceExecutor(
+    preprocess_workers=PREPROCESS_WORKERS,
+    preprocess_queue_depth=PREPROCESS_QUEUE_DEPTH,
+    inference_workers=INFERENCE_WORKERS,
+    inference_queue_depth=INFERENCE_QUEUE_DEPTH,
+)
 
-def extract_face_region(image_bytes: bytes) -> Optional[Image.Image]:
-    try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+batcher = BatchScheduler(
+    run_model,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    run_blocking=executor.inference.run,
+    max_concurrent_batches=INFERENCE_WORKERS,
+    max_queue_size=INFERENCE_QUEUE_DEPTH,
+)
+
+
+# Ürün arama/scraping için paylaşılan, keep-alive bağlantı havuzlu HTTP istemcisi
+http_client = HttpClient(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "50")),
+    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    per_host_connections=int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "8")),
+    connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "3")),
+    read_timeout=float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "10")),
+)
+# Ürün sayfası önbelleği: farklı sorgular aynı ürünü bulduğunda sayfa tekrar indirilip ayrıştırılmaz.
+# TTL dolunca ETag/Last-Modified ile koşullu istek atılır; 304 gelirse kayıt yenilenir.
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "2048"))
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "3600"))
+product_cache = ProductCache(max_entries=PRODUCT_CACHE_SIZE, ttl_seconds=PRODUCT_CACHE_TTL_SECONDS)
+# Bir arama için aynı anda indirilen ürün sayfası sayısı
+PAGE_FETCH_CONCURRENCY = int(os.getenv("PAGE_FETCH_CONCURRENCY", "6"))
+# Tüm istekler genelinde aynı anda çalışan cilt sorunu araması (startup'ta oluşturulur)
+RECOMMENDATION_CONCURRENCY = int(os.getenv("RECOMMENDATION_CONCURRENCY", "4"))
+recommendation_slots: Optional[asyncio.Semaphore] = None
+
+
+@app.on_event("startup")
+async def start_batcher():
+    model_loader.start_background()
+    batcher.start()
+    await http_client.start()
+    global recommendation_slots, bulk_slots
+    recommendation_slots = asyncio.Semaphore(RECOMMENDATION_CONCURRENCY)
+    bulk_slots = asyncio.Semaphore(BULK_MAX_CONCURRENT)
+    if catalog_refresher is not None:
+        catalog_refresher.start()
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+    executor.shutdown()
+    if catalog_refresher is not None:
+        await catalog_refresher.stop()
+    await http_client.close()
+
+# Aynı görselin tekrar yüklenmesi (mobil uygulama retry'ları) için analiz sonucu önbelleği
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "600"))
+result_cache = ResultCache(max_entries=RESULT_CACHE_SIZE, ttl_seconds=RESULT_CACHE_TTL_SECONDS)
+
+# Yüz tespiti küçültülmüş kopya üzerinde yapılır (en uzun kenar piksel cinsinden)
+FACE_DETECTION_MAX_SIDE = int(os.getenv("FACE_DETECTION_MAX_SIDE", "640"))
+face_detector = FaceDetector(detection_max_side=FACE_DETECTION_MAX_SIDE)
+
+
+# Model öncesi kalite kontrolü (bulanıklık, pozlama, yüz boyutu); eşikler ortam değişkenlerinden
+quality_gate = QualityGate(
+    min_face_size=int(os.getenv("QUALITY_MIN_FACE_SIZE", "80")),
+    min_sharpness=float(os.getenv("QUALITY_MIN_SHARPNESS", "25")),
+    min_brightness=float(os.getenv("QUALITY_MIN_BRIGHTNESS", "40")),
+    max_brightness=float(os.getenv("QUALITY_MAX_BRIGHTNESS", "220")),
+    max_clipped_fraction=float(os.getenv("QUALITY_MAX_CLIPPED_FRACTION", "0.4")),
+    enabled=os.getenv("QUALITY_GATE_ENABLED", "1") == "1",
+)
 
-        if img is None:
-            logging.error("Invalid image format")
-            return None
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
+def extract_face_region(image_bytes: bytes):
+    # (BGR yüz kırpıntısı, küçültme oranı) veya None
+    return detect_first_face(image_bytes, face_detector, min_side=DECODE_MIN_SIDE)
 
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
 
-        faces = face_cascade.detectMultiScale(
-            image=gray,
-            scaleFactor=1.1,
-            minNeighbors=4,
-            minSize=(60, 60),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
+def prepare_face_tensor(image_bytes: bytes) -> Optional[torch.Tensor]:
+    # Preprocess thread pool'unda çalışır: decode + yüz kırpma + kalite kontrolü + transform
+    found = extract_face_region(image_bytes)
+    if found is None:
+        return None
+
+    face_crop, factor = found
+    quality = quality_gate.check(face_crop, face_size=min(face_crop.shape[:2]) * factor)
+    QUALITY_GATE_RESULTS.inc(result=quality.code or "passed")
+    if not quality.passed:
+        raise QualityGateError(quality)
 
-        if len(faces) == 0:
-            logging.warning("No face detected.")
-            return None
+    with stage_timer("preprocess"):
+        return torch.from_numpy(face_to_tensor(face_crop))
 
-        # İlk yüzü kırp
-        x, y, w, h = faces[0]
-        face_crop = img[y:y + h, x:x + w]
-        face_rgb = cv2.cvtColor(face_crop, cv2.COLOR_BGR2RGB)
-        pil_face = Image.fromarray(face_rgb).convert("RGB")
-        return pil_face
 
+def quality_rejection(e: QualityGateError) -> HTTPException:
+    return HTTPException(status_code=422, detail={
+        "code": e.result.code,
+        "message": e.result.message,
+        "metrics": e.result.metrics,
+    })
+
+
+def model_not_ready() -> HTTPException:
+    return HTTPException(status_code=503, detail="Model henüz hazır değil, lütfen tekrar deneyin.")
+
+
+def require_ready():
+    if not model_loader.ready:
+        raise model_not_ready()
+
+
+@contextmanager
+def analysis_errors():
+    # Tek ve çok yüzlü analiz aynı hata -> HTTP yanıtı eşlemesini kullanır
+    try:
+        yield
+    except HTTPException:
+        raise
+    except QualityGateError as e:
+        raise quality_rejection(e)
+    except ModelNotReadyError:
+        raise model_not_ready()
+    except ExecutorSaturatedError as e:
+        logging.warning(f"Inference saturated: {e}")
+        raise HTTPException(status_code=503, detail="Sunucu şu anda yoğun, lütfen tekrar deneyin.")
     except Exception as e:
-        logging.error(f"Face extraction error: {str(e)}")
-        return None
+        logging.error(f"Model error: {e}")
+        raise HTTPException(status_code=500, detail=f"Model hatası: {e}")
+
+
+# İsteğe bağlı profil çıkarma: X-Profile-Token başlığı PROFILE_TOKEN ile eşleşirse
+# istek örnekleme profiler'ı + torch.profiler altında çalışır (PROFILE_DIR'e yazılır)
+request_profiler = RequestProfiler(
+    token=os.getenv("PROFILE_TOKEN"),
+    directory=os.getenv("PROFILE_DIR", "profiles"),
+    min_interval_seconds=float(os.getenv("PROFILE_MIN_INTERVAL_SECONDS", "60")),
+    sample_interval_ms=float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")),
+    max_profiles=int(os.getenv("PROFILE_MAX_SESSIONS", "20")),
+)
+
+# Yükleme sınırları: bayt ve piksel sayısı (tam decode öncesi kontrol edilir)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "40000000"))
+
+# Tek görsel kabul eden endpoint'ler: Content-Length sınırı aşan istekler gövde okunmadan reddedilir
+SINGLE_IMAGE_ROUTES = {"/analyze", "/analyze-and-recommend", "/analyze-faces"}
+
+
+@app.middleware("http")
+async def reject_oversized_requests(request, call_next):
+    content_length = request.headers.get("content-length")
+    if (request.url.path in SINGLE_IMAGE_ROUTES and content_length and content_length.isdigit()
+            # multipart başlıkları için küçük bir pay bırakılır
+            and int(content_length) > MAX_UPLOAD_BYTES + 64 * 1024):
+        return JSONResponse(status_code=413, content={
+            "detail": f"Dosya çok büyük (en fazla {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)."
+        })
+    return await call_next(request)
+
+
+# Toplu analizde aynı anda bellekte tutulan/işlenen en fazla görsel sayısı (istek başına)
+BULK_MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", "8"))
+# Tüm toplu istekler genelinde aynı anda işlenen görsel sayısı; fazlası reddedilmez, sırasını bekler
+# (INFERENCE_QUEUE_DEPTH'ten küçük tutulmalı ki batch kuyruğunda interaktif isteklere yer kalsın)
+BULK_MAX_CONCURRENT = int(os.getenv("BULK_MAX_CONCURRENT", "16"))
+bulk_slots: Optional[asyncio.Semaphore] = None
+
+# Çoklu yüz analizinde tek batch'e alınacak en fazla yüz sayısı (en büyükler seçilir)
+MAX_FACES_PER_IMAGE = int(os.getenv("MAX_FACES_PER_IMAGE", "8"))
+
+
+def prepare_faces(image_bytes: bytes, min_face_size: int):
+    """
+    Görseldeki tüm yüzleri (min_face_size üstü) tek bir (N, 3, 224, 224) batch'e hazırlar.
+    (batch, yüzler) döner; yüzler (orijinal koordinatlarda kutu, kalite sonucu) listesidir ve
+    batch satırları kalite kontrolünden geçen yüzlere sırayla karşılık gelir.
+    """
+    with stage_timer("decode"):
+        img, factor = decode_reduced(image_bytes, min_side=DECODE_MIN_SIDE)
+    if img is None:
+        return None, []
+
+    min_side = max(1, min_face_size // factor)
+    with stage_timer("face_detection"):
+        boxes = [box for box in face_detector.detect(img, min_size=(min_side, min_side))
+                 if box[2] >= min_side and box[3] >= min_side]
+    boxes = sorted(boxes, key=lambda b: b[2] * b[3], reverse=True)[:MAX_FACES_PER_IMAGE]
+    if not boxes:
+        return None, []
+
+    # Kalite kontrolünden geçemeyen yüzler modele verilmez, ret nedeniyle raporlanır;
+    # hiçbiri geçemezse tek yüzlü analizdeki gibi ilk ret nedeni döner
+    qualities = []
+    for (x, y, w, h) in boxes:
+        quality = quality_gate.check(img[y:y + h, x:x + w], face_size=min(w, h) * factor)
+        QUALITY_GATE_RESULTS.inc(result=quality.code or "passed")
+        qualities.append(quality)
+    passed = [box for box, quality in zip(boxes, qualities) if quality.passed]
+    if not passed:
+        raise QualityGateError(qualities[0])
+
+    batch = np.empty((len(passed), 3, 224, 224), dtype=np.float32)
+    with stage_timer("preprocess"):
+        for i, (x, y, w, h) in enumerate(passed):
+            face_to_tensor(img[y:y + h, x:x + w], out=batch[i])
+
+    faces = [((x * factor, y * factor, w * factor, h * factor), quality)
+             for (x, y, w, h), quality in zip(boxes, qualities)]
+    return torch.from_numpy(batch), faces
 
 
 # Skin Analysis Function
-async def analyze_skin(file: UploadFile) -> List[str]:
+async def analyze_skin(file: UploadFile, profile=None) -> List[str]:
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Lütfen bir resim dosyası yükleyin.")
 
-    try:
-        # Görseli oku
-        image_bytes = await file.read()
-
-        # Yüzü kırp
-        face_image = extract_face_region(image_bytes)
+    # Görseli sınırlı parçalar halinde oku, formatı ve boyutu decode öncesi doğrula.
+    # Hazırlık kontrolü cache'ten sonra yapılır: model ısınırken de cache isabetleri döner
+    image_bytes = await read_upload(file, MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)
+    return await analyze_image_bytes(image_bytes, profile=profile)
+
+
+async def analyze_image_bytes(image_bytes: bytes, profile=None, bulk: bool = False) -> List[str]:
+    with analysis_errors():
+        # Aynı baytlar daha önce analiz edildiyse görüntü işleme hattını tamamen atla
+        # (profil çıkarılan isteklerde cache atlanır, hattın tamamı görülsün)
+        # Birkaç MB'lık görselin hash'i event loop'u bloklamasın
+        cache_key = await asyncio.to_thread(result_cache.key, image_bytes)
+        cached = result_cache.get(cache_key) if profile is None else None
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache="analysis_result", result="hit")
+            logging.debug(f"[RESULT CACHE HIT] {cache_key}")
+            return cached.detected
+        CACHE_REQUESTS.inc(cache="analysis_result", result="miss")
+
+        require_ready()
+
+        # Yüzü kırp ve modele uygun hale getir (event loop'u bloklamadan).
+        # Toplu analiz 503 almaz; boş worker ve batch kuyruğunda yer açılmasını bekler
+        if bulk:
+            image_tensor = await executor.preprocess.run_when_free(prepare_face_tensor, image_bytes)
+        else:
+            image_tensor = await executor.preprocess.run(prepare_face_tensor, image_bytes)
 
-        if face_image is None:
+        if image_tensor is None:
             raise HTTPException(status_code=400, detail="Fotoğrafta insan yüzü algılanamadı.")
 
-        # Kırpılmış yüzü modele uygun hale getir
-        image_tensor = transform(face_image).unsqueeze(0).to(device)
-
-        with torch.no_grad():
-            outputs = model(image_tensor)
-            probs = torch.sigmoid(outputs).squeeze().cpu().numpy()
-            logging.info(f"Tüm olasılıklar (sigmoid sonrası): {probs}")
-            for i, p in enumerate(probs):
-                logging.info(f"{LABELS[i]} olasılığı: {p:.4f}")
+        # Diğer isteklerle aynı batch'te çalıştırılır, sadece bu isteğe ait satır döner
+        if profile is None:
+            probs = await batcher.submit(image_tensor, wait=bulk)
+        else:
+            # Profil çıkarılan istek kendi forward'ında torch.profiler altında çalışır
+            probs = (await executor.inference.run(profile.run_torch, run_model, image_tensor.unsqueeze(0)))[0]
+        # Aşama süreleri /metrics üzerinden izlenir; olasılıklar sadece debug seviyesinde loglanır
+        logging.debug(f"Tüm olasılıklar (sigmoid sonrası): {probs}")
 
         # Eşiklere göre etiket belirleme
-        detected = []
-        for i, p in enumerate(probs):
-            label = LABELS[i]
-            threshold = THRESHOLDS.get(label, 0.5)
-            if p > threshold:
-                detected.append(label)
+        detected = apply_thresholds(probs)
+        detected = detected if detected else ["no_skin_issue_detected"]
 
-        return detected if detected else ["no_skin_issue_detected"]
+        result_cache.put(cache_key, probs, detected)
+        return detected
 
-    except Exception as e:
-        logging.error(f"Model error: {e}")
-        raise HTTPException(status_code=500, detail=f"Model hatası: {e}")
+
+async def analyze_bulk_item(index: int, filename: str, image_bytes: bytes) -> Dict:
+    # Toplu analizde hatalar isteği kesmez, ilgili satırda raporlanır
+    try:
+        validate_image_bytes(image_bytes, MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)
+        async with bulk_slots:
+            detected = await analyze_image_bytes(image_bytes, bulk=True)
+        return {"index": index, "filename": filename, "detected_skin_issues": detected}
+    except HTTPException as e:
+        return {"index": index, "filename": filename, "status_code": e.status_code, "error": e.detail}
+
+
+async def analyze_faces(file: UploadFile, min_face_size: int) -> List[FaceAnalysis]:
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Lütfen bir resim dosyası yükleyin.")
+
+    require_ready()
+
+    with analysis_errors():
+        image_bytes = await read_upload(file, MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)
+        batch, detected_faces = await executor.preprocess.run(prepare_faces, image_bytes, min_face_size)
+        if batch is None:
+            raise HTTPException(status_code=400, detail="Fotoğrafta insan yüzü algılanamadı.")
+
+        # Kalite kontrolünden geçen tüm yüzler tek bir forward'da
+        rows = iter(await executor.inference.run(run_model, batch))
+
+        faces = []
+        for (x, y, w, h), quality in detected_faces:
+            box = FaceBox(x=x, y=y, width=w, height=h)
+            if not quality.passed:
+                faces.append(FaceAnalysis(box=box, quality_rejection=QualityRejection(
+                    code=quality.code, message=quality.message, metrics=quality.metrics)))
+                continue
+            detected = apply_thresholds(next(rows))
+            faces.append(FaceAnalysis(
+                box=box,
+                detected_skin_issues=detected if detected else ["no_skin_issue_detected"]
+            ))
+        return faces
 
 
 # Get product recommendations based on skin issues
+def build_search_query(issue: str) -> str:
+    # Get product types for this skin issue
+    product_types = PRODUCT_TYPES.get(issue, [])
+
+    # Get search keywords for this skin issue
+    keywords = PRODUCT_KEYWORDS.get(issue, [])
+
+    # Combine issue with product types for better search results
+    if product_types:
+        search_queries = [f"{keyword} {product_type}" for keyword in keywords[:2] for product_type in
+                          product_types[:2]]
+        # Use the first few queries
+        return " OR ".join(search_queries[:6])  # veya [:8]
+
+    # Just use keywords if no product types
+    return " OR ".join(keywords[:6])  # veya [:8]
+
+
+async def recommend_for_issue(issue: str, product_count: int, min_rating: Optional[float],
+                              pages: Optional[SharedPages] = None):
+    # Süreç genelindeki arama bütçesi: aynı anda en fazla RECOMMENDATION_CONCURRENCY arama
+    async with recommendation_slots:
+        products = await search_products(http_client, build_search_query(issue), count=product_count,
+                                         min_rating=min_rating, search_api_key=SEARCH_API_KEY,
+                                         search_engine_id=SEARCH_ENGINE_ID,
+                                         max_concurrent_fetches=PAGE_FETCH_CONCURRENCY, pages=pages,
+                                         cache=product_cache)
+    return issue, products
+
+
+def read_catalog(issues: List[str], product_count: int, min_rating: Optional[float]) -> Dict[str, List[Dict]]:
+    # Katalogda ürünü olmayan ya da min_rating filtresinden hiç ürün geçmeyen sorunlar
+    # sonuçta yer almaz; bunlar için canlı arama yapılır
+    found = {}
+    for issue in issues:
+        products = catalog.products(issue, product_count, min_rating)
+        if products:
+            found[issue] = products
+    return found
+
+
 async def get_recommendations(skin_issues, product_count=3, min_rating=None):
+    """Ürünleri yerel katalogdan döner; katalogda ürünü olmayan sorunlar için canlı arama yapar."""
+    issues = [issue for issue in dict.fromkeys(skin_issues) if issue in PRODUCT_KEYWORDS]
+
     recommendations = {}
+    if catalog is not None:
+        with stage_timer("catalog"):
+            recommendations = await asyncio.to_thread(read_catalog, issues, product_count, min_rating)
 
-    for issue in skin_issues:
-        if issue in PRODUCT_KEYWORDS:
-            # Get product types for this skin issue
-            product_types = PRODUCT_TYPES.get(issue, [])
+    live_issues = [issue for issue in issues if issue not in recommendations]
+    if live_issues and (not SEARCH_API_KEY or not SEARCH_ENGINE_ID):
+        raise HTTPException(status_code=503, detail="Ürün arama servisi yapılandırılmamış.")
 
-            # Get search keywords for this skin issue
-            keywords = PRODUCT_KEYWORDS.get(issue, [])
+    pages = SharedPages()
+    tasks = [asyncio.ensure_future(recommend_for_issue(issue, product_count, min_rating, pages))
+             for issue in live_issues]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            issue, products = await finished
+            recommendations[issue] = products
+            logging.info(f"Live recommendations ready for {issue}: {len(products)} products")
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        pages.cancel_all()
 
-            # Combine issue with product types for better search results
-            if product_types:
-                search_queries = [f"{keyword} {product_type}" for keyword in keywords[:2] for product_type in
-                                  product_types[:2]]
-                # Use the first few queries
-                query = " OR ".join(search_queries[:6])  # veya [:8]
+    return {issue: recommendations[issue] for issue in issues}
 
-            else:
-                # Just use keywords if no product types
-                query = " OR ".join(keywords[:6])  # veya [:8]
 
-            # Search for products
-            products = search_products(query, count=product_count, min_rating=min_rating,
-                                       search_api_key=SEARCH_API_KEY, search_engine_id=SEARCH_ENGINE_ID)
-            recommendations[issue] = products
+async def crawl_issue(issue: str) -> List[Dict]:
+    _, products = await recommend_for_issue(issue, CATALOG_PRODUCTS_PER_ISSUE, None)
+    return products
 
-    return recommendations
+
+# Ürün kataloğu (SQLite): öneriler buradan okunur, arka planda periyodik olarak yenilenir
+CATALOG_ENABLED = os.getenv("CATALOG_ENABLED", "1") == "1"
+CATALOG_PATH = os.getenv("CATALOG_PATH", "product_catalog.sqlite3")
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", str(24 * 3600)))
+CATALOG_PRODUCTS_PER_ISSUE = int(os.getenv("CATALOG_PRODUCTS_PER_ISSUE", "20"))
+
+catalog = ProductCatalog(CATALOG_PATH) if CATALOG_ENABLED else None
+catalog_refresher = None
+if catalog is not None and SEARCH_API_KEY and SEARCH_ENGINE_ID:
+    catalog_refresher = CatalogRefresher(
+        catalog,
+        crawl_issue,
+        issues=list(PRODUCT_KEYWORDS),
+        refresh_interval_seconds=CATALOG_REFRESH_SECONDS,
+    )
 
 # Endpoints
 @app.get("/")
 def read_root():
     return {"message": "Welcome! Visit /docs for API documentation."}
 
+@app.get("/health/live")
+def liveness():
+    # Süreç ayakta ve event loop cevap veriyor
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    # Orkestratör inference trafiğini ancak model yüklenip ısındıktan sonra yönlendirmeli
+    status = model_loader.status()
+    if not model_loader.ready:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Aşama bazlı gecikme histogramları ve cache sayaçları (Prometheus text formatı)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/inference/stats")
+def inference_stats():
+    """Thread pool boyutları, kuyruk derinlikleri ve batch sayaçları."""
+    return {
+        "executor": executor.stats(),
+        "result_cache": result_cache.stats(),
+        "quality_gate": quality_gate.stats(),
+        "batcher": {
+            "max_batch_size": batcher.max_batch_size,
+            "max_wait_ms": BATCH_MAX_WAIT_MS,
+            "queued": batcher.queue_size(),
+            "max_queue_size": batcher.max_queue_size,
+            "batches_run": batcher.batches_run,
+            "items_run": batcher.items_run,
+        },
+        "threads": thread_plan._asdict(),
+        "http_client": http_client.stats(),
+        "product_cache": product_cache.stats(),
+        "catalog": catalog.stats() if catalog is not None else None,
+        "memory": {"pid": os.getpid(), **process_memory()},
+    }
+
 @app.post("/analyze", response_model=SkinAnalysisResponse)
-async def analyze_endpoint(file: UploadFile = File(...)):
-    detected = await analyze_skin(file)
+async def analyze_endpoint(
+        response: Response,
+        file: UploadFile = File(...),
+        profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
+):
+    with request_profiler.session(profile_token, "analyze") as profile:
+        detected = await analyze_skin(file, profile=profile)
+    if profile is not None:
+        response.headers["X-Profile-Id"] = profile.id
     return SkinAnalysisResponse(detected_skin_issues=detected)
 
+@app.post("/analyze-faces", response_model=MultiFaceAnalysisResponse)
+async def analyze_faces_endpoint(
+        file: UploadFile = File(...),
+        min_face_size: int = Query(80, description="Analiz edilecek en küçük yüz boyutu (piksel)")
+):
+    """
+    Fotoğraftaki her yüzü (grup fotoğrafları, önce/sonra kolajları) ayrı ayrı analiz eder.
+    Tüm yüzler tek bir batch halinde modele verilir.
+    """
+    faces = await analyze_faces(file, min_face_size)
+    return MultiFaceAnalysisResponse(faces=faces)
+
+@app.post("/analyze-batch")
+async def analyze_batch_endpoint(files: List[UploadFile] = File(...)):
+    """
+    Çok sayıda görseli (ayrı dosyalar veya zip arşivi) tek istekte analiz eder.
+    Her görsel bittiği anda bir NDJSON satırı olarak döner; sıralama tamamlanma sırasıdır
+    ("index" alanı yükleme sırasını verir).
+    """
+    require_ready()
+
+    sources = [detach_upload(upload) for upload in files]
+
+    def close_sources():
+        for _, fileobj in sources:
+            fileobj.close()
+
+    return StreamingResponse(
+        stream_ndjson(iter_bulk_images(sources, MAX_UPLOAD_BYTES), analyze_bulk_item,
+                      max_in_flight=BULK_MAX_IN_FLIGHT, on_close=close_sources),
+        media_type="application/x-ndjson"
+    )
+
 @app.get("/recommend", response_model=Dict[str, List[ProductResponse]])
 async def recommend_products(
+        response: Response,
         skin_issue: str = Query(..., description="Skin issue type (acne, stain, wrinkle, black_circle, pockmark)"),
         product_count: int = Query(3, description="Number of products to recommend"),
-        min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)")
+        min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)"),
+        profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
 ):
     """
     Get product recommendations for a specific skin issue without requiring image analysis.
@@ -205,35 +646,42 @@ async def recommend_products(
         )
 
     # Get recommendations for the specific issue
-    recommendations = await get_recommendations(
-        [skin_issue],
-        product_count=product_count,
-        min_rating=min_rating
-    )
+    with request_profiler.session(profile_token, "recommend") as profile:
+        recommendations = await get_recommendations(
+            [skin_issue],
+            product_count=product_count,
+            min_rating=min_rating
+        )
+    if profile is not None:
+        response.headers["X-Profile-Id"] = profile.id
 
     return recommendations
 
 @app.post("/analyze-and-recommend", response_model=AnalysisAndRecommendationResponse)
 async def analyze_and_recommend(
+        response: Response,
         file: UploadFile = File(...),
         product_count: int = Query(3, description="Number of products to recommend per skin issue"),
-        min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)")
+        min_rating: Optional[float] = Query(None, description="Minimum product rating (0-5)"),
+        profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
 ):
-    # Analyze skin
-    detected_issues = await analyze_skin(file)
-
-    # Get product recommendations
-    recommendations = await get_recommendations(
-        detected_issues,
-        product_count=product_count,
-        min_rating=min_rating
-    )
+    with request_profiler.session(profile_token, "analyze-and-recommend") as profile:
+        # Analyze skin
+        detected_issues = await analyze_skin(file, profile=profile)
+
+        # Get product recommendations
+        recommendations = await get_recommendations(
+            detected_issues,
+            product_count=product_count,
+            min_rating=min_rating
+        )
+    if profile is not None:
+        response.headers["X-Profile-Id"] = profile.id
 
     return AnalysisAndRecommendationResponse(
         detected_skin_issues=detected_issues,
         recommended_products=recommendations
     )
-from fastapi.responses import JSONResponse
 import time
 
 CACHE = {}
@@ -257,13 +705,17 @@ async def get_skin_issue_products_only(
     if cache_key in CACHE:
         products, timestamp = CACHE[cache_key]
         if is_cache_valid(timestamp):
-            logging.info(f"[CACHE HIT] {cache_key}")
+            CACHE_REQUESTS.inc(cache="skin_issue_products", result="hit")
+            logging.debug(f"[CACHE HIT] {cache_key}")
             return products
         else:
-            logging.info(f"[CACHE EXPIRED] {cache_key}")
+            CACHE_REQUESTS.inc(cache="skin_issue_products", result="expired")
+            logging.debug(f"[CACHE EXPIRED] {cache_key}")
+    else:
+        CACHE_REQUESTS.inc(cache="skin_issue_products", result="miss")
+        logging.debug(f"[CACHE MISS] {cache_key} — Yeni veri çekiliyor...")
 
     # Yeni veri çek
-    logging.info(f"[CACHE MISS] {cache_key} — Yeni veri çekiliyor...")
     recommendations = await get_recommendations(
         [issue_type],
         product_count=product_count,
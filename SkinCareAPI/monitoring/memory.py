@@ -0,0 +1,66 @@
+#memory.py
+# Süreç bellek kullanımı (Linux /proc).
+import os
+import resource
+from typing import Dict, Union
+
+_SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, float]:
+    """Sürecin bellek dökümü (MB); worker'ların PSS toplamı gerçek toplam bellektir."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in _SMAPS_FIELDS:
+                    values[key] = int(rest.split()[0]) / 1024.0  # kB -> MB
+    except OSError:
+        if pid != "self":
+            return {}
+        return {"peak_rss_mb": round(peak_rss_mb(), 1)}
+
+    return {
+        "rss_mb": round(values.get("Rss", 0.0), 1),
+        "pss_mb": round(values.get("Pss", 0.0), 1),
+        "shared_mb": round(values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def current_rss_mb() -> float:
+    # statm ikinci alan: şu an bellekte olan sayfa sayısı (ru_maxrss gibi tepe değil)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM reset_peak_rss ile sıfırlanabilir; ru_maxrss exec öncesi (fork edilen ebeveynin)
+    # tepe değerini de taşır. ru_maxrss Linux'ta kB cinsindendir
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, IndexError, ValueError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def reset_peak_rss() -> bool:
+    """Tepe RSS'i şu anki RSS'e indirir (Linux >= 4.0); desteklenmiyorsa False döner."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def format_memory(memory: Dict[str, float]) -> str:
+    return ", ".join(f"{key[:-3]}={value:.0f}MB" for key, value in memory.items())
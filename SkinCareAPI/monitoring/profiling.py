@@ -0,0 +1,158 @@
+#profiling.py
+# İsteğe bağlı, tek istek için profil çıkarma.
+# Admin token'ı ile gelen bir istek Python örnekleme profiler'ı (tüm thread'ler,
+# flamegraph "folded" formatı) ve model forward'ı için torch.profiler (Chrome trace)
+# altında çalıştırılır. Dosyalar PROFILE_DIR klasörüne yazılır:
+#   <id>.folded      -> flamegraph.pl / speedscope ile açılır
+#   <id>.trace.json  -> chrome://tracing veya Perfetto ile açılır
+# Klasörde en fazla `max_profiles` oturum tutulur; eskiler silinir.
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class SamplingProfiler:
+    """sys._current_frames() ile periyodik yığın örnekleyici (kendi thread'i hariç tüm thread'ler)."""
+
+    def __init__(self, interval_ms: float = 5.0, max_seconds: float = 30.0):
+        self.interval = interval_ms / 1000.0
+        self.max_seconds = max_seconds
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+            self._stop.wait(self.interval)
+
+    def write_folded(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    def __init__(self, name: str, directory: str, interval_ms: float, max_seconds: float):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.directory = directory
+        self.sampler = SamplingProfiler(interval_ms=interval_ms, max_seconds=max_seconds)
+
+    def path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.id}{suffix}")
+
+    def run_torch(self, fn: Callable, *args):
+        """`fn(*args)` çağrısını torch.profiler altında çalıştırır ve Chrome trace olarak kaydeder."""
+        from torch.profiler import ProfilerActivity, profile
+
+        with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+            result = fn(*args)
+        prof.export_chrome_trace(self.path(".trace.json"))
+        return result
+
+
+def _header_bytes(value: str) -> bytes:
+    # Starlette başlıkları latin-1 ile çözer; latin-1 ile geri kodlamak istemcinin gönderdiği baytları verir
+    try:
+        return value.encode("latin-1")
+    except UnicodeEncodeError:
+        return value.encode("utf-8")
+
+
+class RequestProfiler:
+    """Token ile açılan, oran sınırlı istek profilleme; slot alamayan istek profilsiz çalışır."""
+
+    def __init__(self, token: Optional[str], directory: str = "profiles",
+                 min_interval_seconds: float = 60.0, sample_interval_ms: float = 5.0,
+                 max_seconds: float = 30.0, max_profiles: int = 20):
+        self.token = token
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.min_interval_seconds = min_interval_seconds
+        self.sample_interval_ms = sample_interval_ms
+        self.max_seconds = max_seconds
+
+        self._lock = threading.Lock()
+        self._active = False
+        self._last_started = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def _acquire(self, token: Optional[str]) -> bool:
+        # str karşılaştırması ASCII dışı karakterde TypeError verir; baytlar karşılaştırılır
+        if not self.enabled or not token or not hmac.compare_digest(_header_bytes(token), self.token.encode("utf-8")):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._active or now - self._last_started < self.min_interval_seconds:
+                logging.warning("Profiling request skipped: rate limited")
+                return False
+            self._active = True
+            self._last_started = now
+            return True
+
+    @contextmanager
+    def session(self, token: Optional[str], name: str):
+        """Geçerli token ve boş slot varsa bir ProfileSession, yoksa None verir."""
+        if not self._acquire(token):
+            yield None
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        session = ProfileSession(name, self.directory, self.sample_interval_ms, self.max_seconds)
+        session.sampler.start()
+        try:
+            yield session
+        finally:
+            session.sampler.stop()
+            session.sampler.write_folded(session.path(".folded"))
+            self._prune()
+            with self._lock:
+                self._active = False
+            logging.info(f"Profile saved: {session.path('.*')}")
+
+    def _prune(self):
+        # Oturum id'si zaman damgasıyla başlar; dosya adına göre sıralama yaşa göre sıralamadır
+        sessions = {}
+        for filename in os.listdir(self.directory):
+            for suffix in (".folded", ".trace.json"):
+                if filename.endswith(suffix):
+                    sessions.setdefault(filename[:-len(suffix)], []).append(filename)
+        for session_id in sorted(sessions)[:max(0, len(sessions) - self.max_profiles)]:
+            for filename in sessions[session_id]:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError as e:
+                    logging.warning(f"Could not remove old profile {filename}: {e}")
@@ -0,0 +1,96 @@
+#http_client.py
+import asyncio
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+
+class HttpClient:
+    """
+    Scraper ve Custom Search çağrıları için paylaşılan asenkron HTTP istemcisi.
+    Bağlantılar açık tutulur; host başına semaphore ile tek siteye giden istek sayısı sınırlanır.
+    Testlerde `transport` olarak httpx.MockTransport verilebilir.
+    """
+
+    def __init__(self, max_connections: int = 50, max_keepalive_connections: int = 20,
+                 per_host_connections: int = 8, connect_timeout: float = 3.0, read_timeout: float = 10.0,
+                 keepalive_expiry: float = 30.0, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # connect: bağlantı kurma; read/write/pool: yanıt bekleme ve havuzdan bağlantı alma
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.per_host_connections = per_host_connections
+        self.transport = transport
+        self.user_agent = user_agent
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport,
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True,
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_slots.clear()
+        self._in_flight.clear()
+
+    def _slots(self, host: str) -> asyncio.Semaphore:
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.per_host_connections)
+        return slots
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """Host limiti içinde GET; zaman aşımı ve bağlantı hataları httpx.HTTPError olarak yükselir."""
+        if self._client is None:
+            # startup olayı dışında kullanım (ör. betikler) için
+            await self.start()
+        host = urlsplit(url).hostname or ""
+        async with self._slots(host):
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            try:
+                return await self._client.get(url, **kwargs)
+            finally:
+                self._in_flight[host] -= 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "started": self._client is not None,
+            "max_connections": self.limits.max_connections,
+            "per_host_connections": self.per_host_connections,
+            "in_flight": dict(self._in_flight),
+        }
+
+
+async def fetch_text(client: HttpClient, url: str, **kwargs) -> Optional[str]:
+    """200 dönerse gövdeyi, aksi halde (hata/zaman aşımı dahil) None döner."""
+    try:
+        response = await client.get(url, **kwargs)
+    except httpx.HTTPError as e:
+        logging.error(f"Request failed: {url}: {e!r}")
+        return None
+    if response.status_code != 200:
+        logging.error(f"Could not access URL: {url}, Status code: {response.status_code}")
+        return None
+    return response.text
@@ -0,0 +1,126 @@
+#product_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from monitoring.metrics import CACHE_REQUESTS
+
+# Ürünü değiştirmeyen, sadece kampanya/izleme için eklenen sorgu parametreleri
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "gad_source", "srsltid")
+
+
+def canonical_url(url: str) -> str:
+    """Aynı ürün sayfasını gösteren URL'leri tek anahtara indirger (merchantId gibi fiyatı etkileyenler kalır)."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, urlencode(query), ""))
+
+
+class CachedProduct(NamedTuple):
+    product: Dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    timestamp: float  # son indirme ya da 304 ile doğrulama zamanı
+
+
+class ProductCache:
+    """
+    Kanonik ürün URL'sine göre ayrıştırılmış ürün önbelleği (LRU).
+    ttl_seconds dolunca ETag/Last-Modified ile koşullu istek atılır;
+    max_stale_seconds'tan eski kayıt baştan indirilir.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600,
+                 max_stale_seconds: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._entries: "OrderedDict[str, CachedProduct]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def lookup(self, url: str) -> Tuple[Optional[CachedProduct], bool]:
+        """(kayıt, taze mi) döner; süresi geçmiş ama doğrulanabilir kayıtlar taze=False ile döner."""
+        key = canonical_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="product_detail", result="miss")
+                return None, False
+
+            age = time.time() - entry.timestamp
+            if age < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache="product_detail", result="hit")
+                return entry, True
+
+            if age < self.max_stale_seconds and (entry.etag or entry.last_modified):
+                self.revalidations += 1
+                CACHE_REQUESTS.inc(cache="product_detail", result="revalidate")
+                return entry, False
+
+            del self._entries[key]
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="product_detail", result="expired")
+            return None, False
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedProduct]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(self, url: str, product: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        if self.max_entries <= 0:
+            return
+        key = canonical_url(url)
+        with self._lock:
+            self._entries[key] = CachedProduct(dict(product), etag, last_modified, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def mark_not_modified(self, url: str, entry: CachedProduct):
+        # 304: içerik aynı, sadece doğrulama zamanı yenilenir
+        with self._lock:
+            self.not_modified += 1
+            key = canonical_url(url)
+            if key in self._entries:
+                self._entries[key] = entry._replace(timestamp=time.time())
+                self._entries.move_to_end(key)
+
+    @staticmethod
+    def product_for(entry: CachedProduct, url: str) -> Dict:
+        # Çağıranın değişiklikleri önbelleğe yansımasın; bağlantı istenen URL olarak kalsın
+        return dict(entry.product, purchase_link=url)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
@@ -1,17 +1,25 @@
 #trendyol.py
 from pydantic import BaseModel
-from typing import List, Optional
-import requests
+from typing import Dict, List, Optional
+import asyncio
 from bs4 import BeautifulSoup
 import re
 import json
 import logging
 import random
 
+import httpx
 
-# Trendyol Scraper
-def extract_trendyol_data(url):
-    product = {
+from monitoring.metrics import stage_timer
+from scrapers.http_client import HttpClient, fetch_text
+from scrapers.product_cache import ProductCache
+
+# Bir arama için aynı anda indirilen en fazla ürün sayfası
+PAGE_FETCH_CONCURRENCY = 6
+
+
+def empty_product(url):
+    return {
         "name": None,
         "purchase_link": url,
         "price": None,
@@ -19,16 +27,13 @@ def extract_trendyol_data(url):
         "image_url": None,
         "brand": None  # Marka bilgisini ekliyoruz
     }
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logging.error(f"Could not access URL: {url}, Status code: {response.status_code}")
-            return product
 
-        soup = BeautifulSoup(response.text, "html.parser")
+
+def parse_trendyol_html(html, url):
+    """Ürün sayfası HTML'inden ürün bilgilerini çıkarır (CPU işi; event loop dışında çalıştırılır)."""
+    product = empty_product(url)
+    try:
+        soup = BeautifulSoup(html, "html.parser")
 
         # Product name
         for selector in [
@@ -124,12 +129,138 @@ def extract_trendyol_data(url):
         return product
 
 
+# Trendyol Scraper
+async def extract_trendyol_data(client: HttpClient, url, cache: Optional[ProductCache] = None):
+    if cache is None:
+        # Sadece ağ isteği ölçülür; cache isabetleri ve ayrıştırma product_scrape'e girmez
+        with stage_timer("product_scrape"):
+            html = await fetch_text(client, url)
+        if html is None:
+            return empty_product(url)
+        # BeautifulSoup ile ayrıştırma sayfa başına onlarca ms sürebilir; event loop'u bloklamasın
+        return await asyncio.to_thread(parse_trendyol_html, html, url)
+
+    entry, fresh = cache.lookup(url)
+    if fresh:
+        return cache.product_for(entry, url)
+
+    try:
+        with stage_timer("product_scrape"):
+            response = await client.get(url, headers=cache.conditional_headers(entry))
+    except httpx.HTTPError as e:
+        logging.error(f"Request failed: {url}: {e!r}")
+        # Sayfa geçici olarak erişilemezse elimizdeki (süresi geçmiş) kaydı kullan
+        return cache.product_for(entry, url) if entry else empty_product(url)
+
+    if response.status_code == 304 and entry is not None:
+        cache.mark_not_modified(url, entry)
+        return cache.product_for(entry, url)
+    if response.status_code != 200:
+        logging.error(f"Could not access URL: {url}, Status code: {response.status_code}")
+        return empty_product(url)
+
+    product = await asyncio.to_thread(parse_trendyol_html, response.text, url)
+    # İsimsiz sonuç büyük ihtimalle eksik/engellenmiş sayfa; önbelleğe alınmaz
+    if product["name"]:
+        cache.put(url, product, response.headers.get("etag"), response.headers.get("last-modified"))
+    return product
+
+
 def is_product_page(url: str) -> bool:
     # URL'nin gerçek bir ürün sayfası olduğunu anlamak için
     return any(part in url for part in ["/p-", "-p-", "/urun/", "/product/"])
 
 
-def search_products(query, count=3, min_rating=None, search_api_key=None, search_engine_id=None):
+def accept_product(product, min_rating, seen_names, seen_brands) -> bool:
+    # Sadece ismi olan ve daha önce aynı isimde ürün eklenmemiş olanları dahil et
+    if not product["name"] or product["name"] in seen_names:
+        return False
+    # Eğer bu markanın 2 ürününü zaten eklemişsek, bu markayı atla
+    if product["brand"] and product["brand"] in seen_brands and list(seen_brands).count(
+            product["brand"]) >= 2:
+        return False
+    return min_rating is None or (product["rating"] is not None and product["rating"] >= min_rating)
+
+
+class SharedPages:
+    """Bir öneri isteği boyunca URL başına tek sayfa indirme."""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def fetch(self, client: HttpClient, url, cache: Optional[ProductCache] = None) -> asyncio.Future:
+        task = self._tasks.get(url)
+        if task is None:
+            task = self._tasks[url] = asyncio.ensure_future(extract_trendyol_data(client, url, cache))
+        self._waiters[url] = self._waiters.get(url, 0) + 1
+        # Her bekleyen kendi görünümünü iptal edebilir; indirme ancak son bekleyen vazgeçince iptal edilir
+        view = asyncio.shield(task)
+        view.add_done_callback(lambda _: self._release(url, task))
+        return view
+
+    def _release(self, url, task):
+        self._waiters[url] -= 1
+        if self._waiters[url] == 0 and not task.done():
+            task.cancel()
+            # Sonradan aynı URL'yi isteyen yeni bir indirme başlatsın
+            if self._tasks.get(url) is task:
+                del self._tasks[url]
+
+    def cancel_all(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+
+def fetch_product(client: HttpClient, url, pages: Optional[SharedPages] = None,
+                  cache: Optional[ProductCache] = None) -> asyncio.Future:
+    if pages is None:
+        return asyncio.ensure_future(extract_trendyol_data(client, url, cache))
+    return pages.fetch(client, url, cache)
+
+
+async def collect_products(client: HttpClient, urls, count, min_rating, products, seen_names, seen_brands,
+                           max_concurrent_fetches=PAGE_FETCH_CONCURRENCY, pages=None, cache=None):
+    """
+    Ürün sayfalarını sınırlı sayıda eşzamanlı indirir; filtreyi geçenleri `products`'a ekler.
+    `count` ürün kabul edilince kalan indirmeler iptal edilir.
+    """
+    pending = set()
+    remaining = iter(urls)
+    try:
+        while len(products) < count:
+            while len(pending) < max_concurrent_fetches:
+                url = next(remaining, None)
+                if url is None:
+                    break
+                pending.add(fetch_product(client, url, pages, cache))
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    product = task.result()
+                except asyncio.CancelledError:
+                    continue
+                except Exception as e:
+                    # Tek sayfanın hatası, bu sorun için kabul edilmiş ürünleri silmesin
+                    logging.error(f"Product page failed: {e!r}")
+                    continue
+                if len(products) < count and accept_product(product, min_rating, seen_names, seen_brands):
+                    products.append(product)
+                    seen_names.add(product["name"])
+                    if product["brand"]:
+                        seen_brands.add(product["brand"])
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def search_products(client: HttpClient, query, count=3, min_rating=None, search_api_key=None,
+                          search_engine_id=None, max_concurrent_fetches=PAGE_FETCH_CONCURRENCY, pages=None,
+                          cache=None):
     try:
         # Add 'trendyol' to search query to limit results to Trendyol
         search_query = f"{query} site:trendyol.com"
@@ -141,7 +272,8 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
             "num": min(count * 5, 10)  # Daha fazla sonuç alacağız
         }
 
-        response = requests.get(url, params=params)
+        with stage_timer("search_api"):
+            response = await client.get(url, params=params)
         if response.status_code != 200:
             logging.error(f"Search API error: {response.status_code}")
             return []
@@ -162,7 +294,8 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
                 alt_params = params.copy()
                 alt_params["q"] = alt_query
 
-                alt_response = requests.get(url, params=alt_params)
+                with stage_timer("search_api"):
+                    alt_response = await client.get(url, params=alt_params)
                 if alt_response.status_code == 200 and "items" in alt_response.json():
                     results = alt_response.json()
                 else:
@@ -188,22 +321,8 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
         seen_names = set()  # Aynı isimli ürünleri engellemek için
         seen_brands = set()  # Farklı markalardan ürün toplamak için
 
-        for url in unique_urls:
-            product = extract_trendyol_data(url)
-            # Sadece ismi olan ve daha önce aynı isimde ürün eklenmemiş olanları dahil et
-            if product["name"] and product["name"] not in seen_names:
-                # Eğer bu markanın 2 ürününü zaten eklemişsek, bu markayı atla
-                if product["brand"] and product["brand"] in seen_brands and list(seen_brands).count(
-                        product["brand"]) >= 2:
-                    continue
-
-                if min_rating is None or (product["rating"] is not None and product["rating"] >= min_rating):
-                    products.append(product)
-                    seen_names.add(product["name"])
-                    if product["brand"]:
-                        seen_brands.add(product["brand"])
-                    if len(products) >= count:
-                        break
+        await collect_products(client, unique_urls, count, min_rating, products, seen_names, seen_brands,
+                               max_concurrent_fetches, pages, cache)
 
         # Yeterince ürün bulunamadıysa, alternatif arama sorguları deneyelim
         if len(products) < count:
@@ -263,7 +382,8 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
                 alt_params = params.copy()
                 alt_params["q"] = alt_query
 
-                alt_response = requests.get(url, params=alt_params)
+                with stage_timer("search_api"):
+                    alt_response = await client.get(url, params=alt_params)
                 if alt_response.status_code == 200 and "items" in alt_response.json():
                     alt_urls = [
                         item["link"]
@@ -275,23 +395,8 @@ def search_products(query, count=3, min_rating=None, search_api_key=None, search
                     # URL'leri karıştıralım
                     random.shuffle(alt_urls)
 
-                    for alt_url in alt_urls:
-                        if len(products) >= count:
-                            break
-
-                        product = extract_trendyol_data(alt_url)
-                        if product["name"] and product["name"] not in seen_names:
-                            # Eğer bu markanın 2 ürününü zaten eklemişsek, bu markayı atla
-                            if product["brand"] and product["brand"] in seen_brands and list(seen_brands).count(
-                                    product["brand"]) >= 2:
-                                continue
-
-                            if min_rating is None or (
-                                    product["rating"] is not None and product["rating"] >= min_rating):
-                                products.append(product)
-                                seen_names.add(product["name"])
-                                if product["brand"]:
-                                    seen_brands.add(product["brand"])
+                    await collect_products(client, alt_urls, count, min_rating, products, seen_names, seen_brands,
+                                           max_concurrent_fetches, pages, cache)
 
         return products[:count]  # Return requested number of products
     except Exception as e:
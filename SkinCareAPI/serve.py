@@ -0,0 +1,133 @@
+#serve.py
+# Çok worker'lı sunum: model ağırlıkları bir kez yüklenir, worker'lar fork ile paylaşır.
+#
+#   python serve.py --workers 4 --port 8000
+#
+# `uvicorn main:app --workers N` her worker'da main.py'yi yeniden import eder ve
+# ConvNeXt-base ağırlıklarını N kez yükler. Burada ana süreç modeli yükler, soketi
+# açar ve worker'ları fork eder; ağırlık tensörleri copy-on-write ile paylaşılır
+# (inference sırasında yazılmadıkları için kopyalanmazlar). Her worker açılışta
+# kendi bellek dökümünü (rss/pss/shared/private) loglar.
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Dict
+
+import torch
+import uvicorn
+
+from monitoring.memory import format_memory, process_memory
+
+# ONNX Runtime oturumu kendi thread havuzunu oluşturduğu anda başlatır; fork sonrası
+# çocukta bu thread'ler bulunmaz. Bu motorlar (ve CUDA) her worker'da ayrı yüklenir.
+FORK_UNSAFE_BACKENDS = ("onnx",)
+
+
+def run_worker(index: int, sock, args):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    import main
+
+    # Plan ana süreçte WEB_CONCURRENCY=workers ile uygulandı; OpenMP ayarı fork'ta
+    # korunur ama intra-op sayısını worker'ın kendi thread'inde de sabitle
+    torch.set_num_threads(main.thread_plan.intra_op)
+
+    if main.model_loader.ready:
+        main.model_loader.warmup()
+        logging.info(f"Worker {index} (pid {os.getpid()}) memory: {format_memory(process_memory())}")
+
+    config = uvicorn.Config(main.app, host=args.host, port=args.port, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(index: int, sock, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(index, sock, args)
+        except BaseException as e:
+            logging.error(f"Worker {index} crashed: {e}")
+            code = 1
+        finally:
+            # Ana sürecin atexit/finalizer'ları çocukta çalışmasın
+            os._exit(code)
+    return pid
+
+
+def main_loop(args):
+    # main.py'deki thread planı CPU'yu bu sayıda sürece böler
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    # eager modda main.py import sırasında warmup forward'ı çalıştırır; ana süreçte
+    # torch thread havuzu başlamasın (fork'ta kopyalanmaz). Yüklemeyi aşağıda biz yaparız,
+    # paylaşılamayan motorları worker'lar startup'ta yükler.
+    if os.getenv("MODEL_LOAD_MODE") == "eager":
+        logging.warning("MODEL_LOAD_MODE=eager is ignored by serve.py; the parent loads without warmup")
+    os.environ["MODEL_LOAD_MODE"] = "background"
+    import main
+
+    shared = main.INFERENCE_BACKEND not in FORK_UNSAFE_BACKENDS and main.device.type == "cpu"
+    if shared:
+        main.model_loader.load(warmup=False)
+        if not main.model_loader.ready:
+            sys.exit(f"Model could not be loaded: {main.model_loader.error}")
+        logging.info(f"Model loaded once in parent: {format_memory(process_memory())}")
+    else:
+        logging.warning(f"Backend {main.INFERENCE_BACKEND} on {main.device} is not fork-safe; "
+                        f"each worker loads its own copy")
+
+    # Ana süreçte oluşan nesneleri GC'nin dışında tut: aksi halde çocuktaki ilk
+    # toplama onların başlıklarına yazıp paylaşılan sayfaları kopyalatır
+    gc.freeze()
+
+    sock = uvicorn.Config(main.app, host=args.host, port=args.port).bind_socket()
+    workers: Dict[int, int] = {}
+    for index in range(args.workers):
+        workers[spawn(index, sock, args)] = index
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = workers.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logging.warning(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+        # Yeniden fork: model ana süreçte hazır olduğu için tekrar yüklenmez
+        time.sleep(1)
+        workers[spawn(index, sock, args)] = index
+
+    sock.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Paylaşılan model ağırlıklarıyla çok worker'lı API sunumu")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main_loop(parse_args())
@@ -0,0 +1,9 @@
+#conftest.py
+# Testler SkinCareAPI klasöründen çalıştırılır: python -m pytest tests
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+# calibrate_thresholds.py depo kökündedir
+sys.path.append(os.path.dirname(API_DIR))
@@ -0,0 +1,114 @@
+#test_batcher.py
+import asyncio
+import time
+
+import numpy as np
+import pytest
+import torch
+
+from inference.batcher import BatchScheduler
+from inference.executor import ExecutorSaturatedError
+
+
+def row_sums(batch: torch.Tensor) -> np.ndarray:
+    # Her satır kendi tensörünün toplamını döner; çağırana doğru satırın gittiği görülür
+    return batch.reshape(len(batch), -1).sum(dim=1, keepdim=True).numpy()
+
+
+def test_full_batch_is_flushed_without_waiting_for_deadline():
+    sizes = []
+
+    def forward(batch):
+        sizes.append(len(batch))
+        return row_sums(batch)
+
+    async def run():
+        batcher = BatchScheduler(forward, max_batch_size=4, max_wait_ms=5000)
+        start = time.monotonic()
+        results = await asyncio.gather(*(batcher.submit(torch.full((1, 2, 2), float(i))) for i in range(4)))
+        elapsed = time.monotonic() - start
+        await batcher.stop()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    assert sizes == [4]
+    assert [float(r[0]) for r in results] == [0.0, 4.0, 8.0, 12.0]
+    assert elapsed < 1.0
+
+
+def test_partial_batch_is_flushed_at_deadline():
+    sizes = []
+
+    def forward(batch):
+        sizes.append(len(batch))
+        return row_sums(batch)
+
+    async def run():
+        batcher = BatchScheduler(forward, max_batch_size=8, max_wait_ms=50)
+        start = time.monotonic()
+        results = await asyncio.gather(batcher.submit(torch.ones(1, 2, 2)), batcher.submit(torch.zeros(1, 2, 2)))
+        elapsed = time.monotonic() - start
+        await batcher.stop()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    assert sizes == [2]
+    assert [float(r[0]) for r in results] == [4.0, 0.0]
+    assert 0.04 <= elapsed < 1.0
+
+
+def test_full_queue_rejects_unless_caller_waits():
+    async def run():
+        release = asyncio.Event()
+
+        async def run_blocking(fn, batch):
+            await release.wait()
+            return fn(batch)
+
+        batcher = BatchScheduler(row_sums, max_batch_size=1, max_wait_ms=0,
+                                 run_blocking=run_blocking, max_queue_size=1)
+        running = asyncio.ensure_future(batcher.submit(torch.ones(1)))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(batcher.submit(torch.ones(1)))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await batcher.submit(torch.ones(1))
+
+        waiting = asyncio.ensure_future(batcher.submit(torch.full((1,), 3.0), wait=True))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+        release.set()
+        results = await asyncio.gather(running, queued, waiting)
+        await batcher.stop()
+        return results
+
+    assert [float(r[0]) for r in asyncio.run(run())] == [1.0, 1.0, 3.0]
+
+
+def test_stop_finishes_running_batch_and_fails_queued_requests():
+    async def run():
+        release = asyncio.Event()
+
+        async def run_blocking(fn, batch):
+            await release.wait()
+            return fn(batch)
+
+        batcher = BatchScheduler(row_sums, max_batch_size=1, max_wait_ms=0, run_blocking=run_blocking)
+        running = asyncio.ensure_future(batcher.submit(torch.ones(1)))
+        await asyncio.sleep(0.01)
+        queued = [asyncio.ensure_future(batcher.submit(torch.ones(1))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        stopping = asyncio.ensure_future(batcher.stop())
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.wait_for(stopping, 1.0)
+
+        assert float((await running)[0]) == 1.0
+        for future in queued:
+            with pytest.raises(ExecutorSaturatedError):
+                await asyncio.wait_for(future, 1.0)
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+#test_bulk.py
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from inference.bulk import BulkReadError, iter_bulk_images, stream_ndjson  # noqa: E402
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 64
+
+
+def zip_bytes(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def corrupt_member(archive: bytes, data: bytes) -> bytes:
+    # Üyenin içeriğini değiştir: CRC artık tutmaz
+    position = archive.index(data)
+    return archive[:position] + bytes([data[0] ^ 0xFF]) + archive[position + 1:]
+
+
+def collect(sources):
+    async def analyze(index, filename, image_bytes):
+        return {"index": index, "filename": filename, "size": len(image_bytes)}
+
+    async def run():
+        images = iter_bulk_images([(name, io.BytesIO(data)) for name, data in sources], max_bytes=1024)
+        return [json.loads(line) async for line in stream_ndjson(images, analyze)]
+
+    return sorted(asyncio.run(run()), key=lambda row: row["index"])
+
+
+def test_corrupt_archive_does_not_stop_later_files():
+    rows = collect([("photos.zip", b"not a zip"), ("ok.jpg", JPEG)])
+
+    assert [row["filename"] for row in rows] == ["photos.zip", "ok.jpg"]
+    assert rows[0]["status_code"] == 400 and "error" in rows[0]
+    assert rows[1]["size"] == len(JPEG)
+
+
+def test_bad_crc_member_is_reported_and_others_are_analyzed():
+    second = b"\xff\xd8\xff" + b"\x11" * 64
+    archive = corrupt_member(zip_bytes([("a.jpg", JPEG), ("b.jpg", second), ("c.jpg", JPEG)]), second)
+    rows = collect([("photos.zip", archive), ("ok.jpg", JPEG)])
+
+    assert [row["filename"] for row in rows] == ["photos.zip/a.jpg", "photos.zip/b.jpg",
+                                                 "photos.zip/c.jpg", "ok.jpg"]
+    assert rows[1]["status_code"] == 400
+    assert all("error" not in row for i, row in enumerate(rows) if i != 1)
+
+
+def test_non_image_members_are_skipped():
+    archive = zip_bytes([("notes.txt", b"hello"), ("dir/face.png", JPEG)])
+    items = list(iter_bulk_images([("photos.zip", io.BytesIO(archive))], max_bytes=1024))
+
+    assert [name for name, _ in items] == ["photos.zip/dir/face.png"]
+    assert not isinstance(items[0][1], BulkReadError)
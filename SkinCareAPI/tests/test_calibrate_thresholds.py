@@ -0,0 +1,54 @@
+#test_calibrate_thresholds.py
+import numpy as np
+
+from calibrate_thresholds import choose_threshold, metrics_at, operating_points, probability_threshold
+
+# Eşit skorlar ve iki sınıfın karıştığı bölge bilerek eklendi
+LOGITS = np.array([3.0, 2.5, 2.5, 1.0, 0.5, 0.5, 0.5, -0.2, -1.0, -3.0, 4.0, 1.0])
+LABELS = np.array([1, 1, 0, 1, 0, 1, 0, 0, 1, 0, 1, 0])
+
+
+def brute_force(logits, labels, threshold):
+    predicted = logits > threshold
+    actual = labels.astype(bool)
+    tp = np.sum(predicted & actual)
+    fp = np.sum(predicted & ~actual)
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / actual.sum()
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def test_operating_points_match_brute_force_sweep():
+    points = operating_points(LOGITS, LABELS)
+
+    # Her farklı skor bir eşik grubu + hiç pozitif olmayan nokta
+    assert len(points["threshold"]) == len(np.unique(LOGITS)) + 1
+    for i, threshold in enumerate(points["threshold"]):
+        precision, recall, f1 = brute_force(LOGITS, LABELS, threshold)
+        assert points["precision"][i] == precision
+        assert points["recall"][i] == recall
+        assert np.isclose(points["f1"][i], f1)
+
+
+def test_thresholds_fall_strictly_between_neighbouring_scores():
+    thresholds = operating_points(LOGITS, LABELS)["threshold"]
+    scores = np.unique(LOGITS)
+
+    assert np.all(np.diff(thresholds) < 0)
+    assert not np.isin(thresholds, scores).any()
+
+
+def test_chosen_threshold_reproduces_its_metrics_in_probability_space():
+    points = operating_points(LOGITS, LABELS)
+    for min_precision in (None, 0.75, 1.0):
+        best = choose_threshold(points, min_precision)
+        measured = metrics_at(LOGITS, LABELS, probability_threshold(points["threshold"][best]))
+        assert np.isclose(measured["precision"], points["precision"][best])
+        assert np.isclose(measured["recall"], points["recall"][best])
+
+
+def test_probability_threshold_stays_below_one():
+    assert probability_threshold(0.0) == 0.5
+    for logit in (14.6, 20.0, 40.0, 1000.0):
+        assert probability_threshold(logit) < 1.0
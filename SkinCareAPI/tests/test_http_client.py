@@ -0,0 +1,46 @@
+#test_http_client.py
+import asyncio
+
+import httpx
+
+from scrapers.http_client import HttpClient, fetch_text
+
+
+def test_per_host_limit():
+    active = {"now": 0, "max": 0}
+
+    async def handler(request):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        return httpx.Response(200, text="ok")
+
+    async def run():
+        client = HttpClient(per_host_connections=2, transport=httpx.MockTransport(handler))
+        await asyncio.gather(*(client.get(f"https://www.trendyol.com/{i}") for i in range(6)))
+        stats = client.stats()
+        await client.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert active["max"] == 2
+    assert stats["in_flight"] == {"www.trendyol.com": 0}
+
+
+def test_fetch_text_returns_none_on_error_status_and_transport_error():
+    def handler(request):
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        if request.url.path == "/down":
+            raise httpx.ConnectTimeout("timeout")
+        return httpx.Response(200, text="sayfa")
+
+    async def run():
+        client = HttpClient(transport=httpx.MockTransport(handler))
+        try:
+            return [await fetch_text(client, f"https://example.com/{path}") for path in ("ok", "missing", "down")]
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) == ["sayfa", None, None]
@@ -0,0 +1,92 @@
+#test_product_cache.py
+import asyncio
+
+import httpx
+
+from scrapers.http_client import HttpClient
+from scrapers.product_cache import ProductCache, canonical_url
+from scrapers.trendyol import extract_trendyol_data
+
+URL = "https://www.trendyol.com/marka/krem-p-42"
+PAGE = "<html><h1 class='pr-new-br'>{name}</h1></html>"
+
+
+def test_canonical_url_drops_tracking_params_and_fragment():
+    assert canonical_url("HTTPS://WWW.Trendyol.com/marka/krem-p-42/?utm_source=x&merchantId=7#yorum") == \
+        "https://www.trendyol.com/marka/krem-p-42?merchantId=7"
+
+
+def test_lru_eviction():
+    cache = ProductCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"{URL}{i}", {"name": str(i)})
+    assert cache.lookup(f"{URL}0") == (None, False)
+    assert cache.lookup(f"{URL}2")[1] is True
+    assert cache.stats()["evictions"] == 1
+
+
+class FakeOrigin:
+    """ETag destekleyen sahte ürün sayfası sunucusu."""
+
+    def __init__(self):
+        self.name = "Krem A"
+        self.etag = '"v1"'
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304)
+        return httpx.Response(200, text=PAGE.format(name=self.name), headers={"ETag": self.etag})
+
+
+def fetch(origin, cache, url=URL):
+    async def run():
+        client = HttpClient(transport=httpx.MockTransport(origin.handler))
+        try:
+            return await extract_trendyol_data(client, url, cache)
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+
+def test_fresh_hit_skips_network_and_keeps_requested_link():
+    origin, cache = FakeOrigin(), ProductCache(ttl_seconds=3600)
+    fetch(origin, cache)
+    product = fetch(origin, cache, URL + "?utm_source=google")
+    assert origin.requests == [None]
+    assert product["name"] == "Krem A"
+    assert product["purchase_link"] == URL + "?utm_source=google"
+
+
+def test_stale_entry_is_revalidated_and_304_renews_it():
+    origin, cache = FakeOrigin(), ProductCache(ttl_seconds=0)
+    fetch(origin, cache)
+    product = fetch(origin, cache)
+    assert origin.requests == [None, '"v1"']
+    assert product["name"] == "Krem A"
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_changed_page_is_reparsed():
+    origin, cache = FakeOrigin(), ProductCache(ttl_seconds=0)
+    fetch(origin, cache)
+    origin.name, origin.etag = "Krem B", '"v2"'
+    assert fetch(origin, cache)["name"] == "Krem B"
+
+
+def test_entry_older_than_max_stale_is_refetched_unconditionally():
+    origin, cache = FakeOrigin(), ProductCache(ttl_seconds=0, max_stale_seconds=0)
+    fetch(origin, cache)
+    fetch(origin, cache)
+    assert origin.requests == [None, None]
+
+
+def test_stale_entry_is_served_when_refetch_fails():
+    origin, cache = FakeOrigin(), ProductCache(ttl_seconds=0)
+    fetch(origin, cache)
+
+    def down(request):
+        raise httpx.ConnectError("down")
+    origin.handler = down
+    assert fetch(origin, cache)["name"] == "Krem A"
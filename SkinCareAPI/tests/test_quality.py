@@ -0,0 +1,95 @@
+#test_quality.py
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from inference.quality import QualityGate, QualityGateError  # noqa: E402
+
+
+def frame(mean: float, amplitude: float, size: int = 200, block: int = 4) -> np.ndarray:
+    # Dama deseni: ortalama parlaklık `mean`, kenar keskinliği `amplitude` ile ayarlanır
+    ys, xs = np.indices((size, size)) // block
+    gray = mean + np.where((ys + xs) % 2 == 0, amplitude, -amplitude)
+    gray = np.clip(gray, 0, 255).astype(np.uint8)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def test_sharp_well_exposed_face_passes():
+    result = QualityGate().check(frame(128, 50))
+
+    assert result.passed and result.code is None
+    assert result.metrics["sharpness"] > 25.0
+    assert 40.0 < result.metrics["brightness"] < 220.0
+
+
+def test_flat_face_is_rejected_as_blurry():
+    result = QualityGate().check(frame(128, 1))
+
+    assert result.code == "image_too_blurry"
+    assert result.metrics["sharpness"] < 25.0
+
+
+def test_blur_threshold_is_configurable():
+    face = frame(128, 3)
+    sharpness = QualityGate().measure(face)["sharpness"]
+
+    assert QualityGate(min_sharpness=sharpness - 1).check(face).passed
+    assert QualityGate(min_sharpness=sharpness + 1).check(face).code == "image_too_blurry"
+
+
+def test_dark_face_is_rejected():
+    assert QualityGate().check(frame(25, 10)).code == "image_too_dark"
+
+
+def test_bright_face_is_rejected_as_overexposed():
+    assert QualityGate().check(frame(235, 10)).code == "image_overexposed"
+
+
+def test_clipped_highlights_are_rejected_as_overexposed():
+    # Ortalama parlaklık normal, ama piksellerin yarısı 255'e doymuş
+    result = QualityGate().check(frame(178, 77))
+
+    assert result.metrics["brightness"] < 220.0
+    assert result.metrics["clipped_fraction"] > 0.4
+    assert result.code == "image_overexposed"
+
+
+def test_small_face_is_rejected_unless_original_size_is_given():
+    small = frame(128, 50, size=60)
+
+    assert QualityGate().check(small).code == "face_too_small"
+    # Küçültülmüş decode: kırpıntı küçük ama yüz orijinal görselde yeterince büyük
+    assert QualityGate().check(small, face_size=240).passed
+
+
+def test_disabled_gate_passes_everything_and_counts_results():
+    assert QualityGate(enabled=False).check(frame(0, 0)).passed
+
+    gate = QualityGate()
+    gate.check(frame(128, 50))
+    gate.check(frame(25, 10))
+    assert gate.stats()["counters"] == {"passed": 1, "failed": 1, "image_too_dark": 1}
+
+
+def test_rejection_maps_to_422(monkeypatch, tmp_path):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("dotenv")
+    monkeypatch.setenv("CATALOG_ENABLED", "0")
+    monkeypatch.chdir(tmp_path)
+    import main
+    from fastapi import HTTPException
+
+    result = QualityGate().check(frame(128, 1))
+
+    async def analyze():
+        with main.analysis_errors():
+            raise QualityGateError(result)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(analyze())
+    assert error.value.status_code == 422
+    assert error.value.detail == {"code": "image_too_blurry", "message": result.message,
+                                  "metrics": result.metrics}
@@ -0,0 +1,75 @@
+#test_result_cache.py
+import numpy as np
+import pytest
+
+from inference import result_cache
+from inference.result_cache import ResultCache
+
+
+class FakeClock:
+    """result_cache modülündeki `time` yerine geçer; zaman sadece elle ilerler."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(result_cache, "time", fake)
+    return fake
+
+
+def test_key_depends_only_on_content():
+    assert ResultCache.key(b"image") == ResultCache.key(bytes(bytearray(b"image")))
+    assert ResultCache.key(b"image") != ResultCache.key(b"image2")
+    assert len(ResultCache.key(b"")) == 32
+
+
+def test_hit_returns_a_copy_of_the_stored_probabilities(clock):
+    cache = ResultCache()
+    probs = np.array([0.1, 0.9])
+    cache.put("k", probs, ["acne"])
+    probs[0] = 0.5
+
+    entry = cache.get("k")
+    assert entry.detected == ["acne"]
+    assert entry.probs.tolist() == [0.1, 0.9]
+    assert cache.stats()["hits"] == 1
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = ResultCache(ttl_seconds=60)
+    cache.put("k", np.zeros(2), [])
+
+    clock.now += 59.9
+    assert cache.get("k") is not None
+    clock.now += 0.1
+    assert cache.get("k") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2)
+    cache.put("a", np.zeros(1), [])
+    cache.put("b", np.zeros(1), [])
+    # "a" okununca en son kullanılan olur; yer açmak için "b" atılır
+    assert cache.get("a") is not None
+    cache.put("c", np.zeros(1), [])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_capacity_disables_the_cache(clock):
+    cache = ResultCache(max_entries=0)
+    cache.put("k", np.zeros(1), [])
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,97 @@
+#test_trendyol.py
+# Scraper testleri gerçek ağa çıkmaz: HttpClient'a httpx.MockTransport verilir.
+import asyncio
+
+import httpx
+
+from scrapers.http_client import HttpClient
+from scrapers.trendyol import SharedPages, collect_products
+
+PAGE = "<html><h1 class='pr-new-br'>{name}</h1><span class='prc-dsc'>100 TL</span></html>"
+
+
+def product_url(i: int) -> str:
+    return f"https://www.trendyol.com/marka/urun-p-{i}"
+
+
+def mock_client(handler) -> HttpClient:
+    return HttpClient(transport=httpx.MockTransport(handler))
+
+
+def test_collect_products_stops_at_count_and_cancels_leftovers():
+    started, finished = [], []
+
+    async def handler(request):
+        i = int(str(request.url).rsplit("-", 1)[1])
+        started.append(i)
+        # İlk iki sayfa hızlı, diğerleri yavaş
+        await asyncio.sleep(0.01 if i < 2 else 5)
+        finished.append(i)
+        return httpx.Response(200, text=PAGE.format(name=f"Brand{i} Krem {i}"))
+
+    async def run():
+        client = mock_client(handler)
+        products = []
+        await asyncio.wait_for(collect_products(client, [product_url(i) for i in range(10)], 2, None,
+                                                products, set(), set(), max_concurrent_fetches=4), 2.0)
+        await asyncio.sleep(0.05)
+        await client.close()
+        return products
+
+    products = asyncio.run(run())
+    assert [p["name"] for p in products] == ["Brand0 Krem 0", "Brand1 Krem 1"]
+    # Pencere en fazla kabul edilen sayfa kadar yenilenir; kalan URL'ler hiç istenmez
+    assert set(started) <= set(range(6))
+    # Yavaş sayfalar iptal edildi
+    assert sorted(finished) == [0, 1]
+
+
+def test_failing_page_does_not_discard_accepted_products():
+    async def handler(request):
+        if request.url.path.endswith("-p-1"):
+            raise RuntimeError("boom")
+        return httpx.Response(200, text=PAGE.format(name=f"Urun {request.url.path}"))
+
+    async def run():
+        client = mock_client(handler)
+        products = []
+        await collect_products(client, [product_url(i) for i in range(3)], 3, None, products, set(), set())
+        await client.close()
+        return products
+
+    assert len(asyncio.run(run())) == 2
+
+
+def test_shared_page_fetch_is_cancelled_with_its_last_consumer():
+    requests = []
+
+    async def handler(request):
+        requests.append(str(request.url))
+        await asyncio.sleep(5)
+        return httpx.Response(200, text=PAGE.format(name="X"))
+
+    async def run():
+        client = mock_client(handler)
+        pages = SharedPages()
+        first = pages.fetch(client, product_url(1))
+        second = pages.fetch(client, product_url(1))
+        await asyncio.sleep(0.01)
+        shared = pages._tasks[product_url(1)]
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not shared.done()
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert shared.cancelled()
+        # Sonraki istek yeni bir indirme başlatır
+        third = pages.fetch(client, product_url(1))
+        await asyncio.sleep(0.01)
+        assert pages._tasks[product_url(1)] is not shared
+        third.cancel()
+        await asyncio.sleep(0.01)
+        await client.close()
+
+    asyncio.run(run())
+    assert len(requests) == 2
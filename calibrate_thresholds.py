@@ -0,0 +1,202 @@
+#calibrate_thresholds.py
+# Etiket bazlı karar eşiklerini (THRESHOLDS) test seti üzerinde yeniden ayarlar.
+#
+# 1) Modeli skinanalysismodel.py'deki test setinde bir kez çalıştırıp logit'leri kaydet:
+#      python calibrate_thresholds.py collect --weights 75epoch-convnextbase.pth --output holdout_logits.npz
+# 2) Kaydedilen logit'ler üzerinde eşik taraması (saniyeler sürer, model gerekmez):
+#      python calibrate_thresholds.py sweep holdout_logits.npz
+#      python calibrate_thresholds.py sweep holdout_logits.npz --min-precision 0.9 --label wrinkle --label stain
+#
+# API bir etiketi `p > eşik` olduğunda tespit eder; tarama da aynı kuralı kullanır.
+import argparse
+import ast
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+THRESHOLDS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SkinCareAPI", "data", "skin_issues.py")
+
+
+def current_thresholds(path: str = THRESHOLDS_SOURCE) -> Dict[str, float]:
+    """API'deki THRESHOLDS sözlüğünü (pydantic vb. import etmeden) kaynak dosyadan okur."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "THRESHOLDS" for t in node.targets):
+            return ast.literal_eval(node.value)
+    return {}
+
+
+# ----------------------------------------------------------------------------
+# COLLECT
+# ----------------------------------------------------------------------------
+def collect(weights: str, output: str, data_dir: Optional[str], batch_size: int, num_workers: int,
+            arch: str = "convnext_base"):
+    import torch
+    from torch.utils.data import DataLoader
+
+    import skinanalysismodel as training
+
+    paths, labels = training.load_test_split(data_dir or training.klasor_yolu)
+    loader = DataLoader(training.SkinDataset(paths, labels, transform=training.base_transform),
+                        batch_size=batch_size, shuffle=False, num_workers=num_workers)
+
+    model = training.build_model(pretrained=False, arch=arch)
+    model.load_state_dict(torch.load(weights, map_location=training.device, weights_only=True))
+    model.eval()
+
+    logits = []
+    with torch.inference_mode():
+        for images, _ in loader:
+            logits.append(model(images.to(training.device)).float().cpu().numpy())
+
+    np.savez_compressed(
+        output,
+        logits=np.concatenate(logits),
+        labels=np.asarray(labels, dtype=np.uint8),
+        class_names=np.asarray(training.class_names),
+        paths=np.asarray(paths),
+    )
+    print(f"[INFO] {len(paths)} test görüntüsünün logit'leri kaydedildi: {output}")
+
+
+# ----------------------------------------------------------------------------
+# SWEEP
+# ----------------------------------------------------------------------------
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def probability_threshold(logit: float) -> float:
+    # 6 basamağa yuvarlama logit > ~14.5'te 1.0 verir ve `p > 1.0` etiketi tamamen kapatır;
+    # o durumda daha fazla basamak kullan, yine de 1.0'ın altında tut
+    p = _sigmoid(np.float64(logit))
+    for decimals in range(6, 16):
+        rounded = float(np.round(p, decimals))
+        if rounded < 1.0:
+            return rounded
+    return float(min(p, np.nextafter(1.0, 0.0)))
+
+
+def operating_points(logits: np.ndarray, labels: np.ndarray) -> Dict[str, np.ndarray]:
+    """Tek bir etiket için olası tüm eşiklerdeki precision/recall/F1 değerleri (tek sıralama ile)."""
+    order = np.argsort(-logits, kind="stable")
+    scores = logits[order].astype(np.float64)
+    positives = labels[order].astype(np.int64)
+
+    tp = np.cumsum(positives)
+    fp = np.cumsum(1 - positives)
+    # Eşit skorlar aynı eşikte birlikte pozitif olur; sadece grup sonlarını tut
+    last_of_group = np.r_[scores[1:] != scores[:-1], True]
+    tp, fp, group_scores = tp[last_of_group], fp[last_of_group], scores[last_of_group]
+
+    # Eşikler komşu skorların ortasında, logit uzayında (p=1 yakınında değerler hâlâ ayrışır)
+    next_scores = np.r_[group_scores[1:], group_scores[-1] - 1.0]
+    thresholds = (group_scores + next_scores) / 2.0
+
+    # Hiçbir örneğin pozitif sayılmadığı nokta (eşik en yüksek skorun üstünde)
+    tp = np.r_[0, tp]
+    fp = np.r_[0, fp]
+    thresholds = np.r_[scores[0] + 1.0, thresholds]
+
+    total_pos = positives.sum()
+    precision = np.divide(tp, tp + fp, out=np.ones(len(tp)), where=(tp + fp) > 0)
+    recall = tp / total_pos if total_pos > 0 else np.zeros(len(tp))
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros(len(tp)), where=(precision + recall) > 0)
+    return {"threshold": thresholds, "precision": precision, "recall": recall, "f1": f1}
+
+
+def metrics_at(logits: np.ndarray, labels: np.ndarray, threshold: float) -> Dict[str, float]:
+    predicted = _sigmoid(logits.astype(np.float64)) > threshold
+    actual = labels.astype(bool)
+    tp = np.sum(predicted & actual)
+    fp = np.sum(predicted & ~actual)
+    fn = np.sum(~predicted & actual)
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": float(precision), "recall": float(recall), "f1": float(f1)}
+
+
+def choose_threshold(points: Dict[str, np.ndarray], min_precision: Optional[float]) -> int:
+    """F1'i en yükselten ya da hedef precision'ı sağlayan en düşük eşiğin indeksini döner."""
+    if min_precision is None:
+        return int(np.argmax(points["f1"]))
+    meets = np.flatnonzero(points["precision"] >= min_precision)
+    # Nokta 0 (hiç pozitif yok) precision=1 sayılır; gerçek bir eşik varsa onu tercih et
+    meets = meets[meets > 0] if np.any(meets > 0) else meets
+    if len(meets) == 0:
+        # Hedefe ulaşan nokta yoksa en yüksek precision'lı nokta
+        return int(np.argmax(points["precision"]))
+    return int(meets[np.argmax(points["recall"][meets])])
+
+
+def sweep(path: str, min_precision: Optional[float], only_labels, output: Optional[str]):
+    data = np.load(path)
+    logits, labels = data["logits"], data["labels"]
+    class_names = [str(name) for name in data["class_names"]]
+    existing = current_thresholds()
+
+    print(f"[INFO] {len(labels)} örnek, {len(class_names)} etiket"
+          + (f", hedef precision >= {min_precision}" if min_precision is not None else ", hedef: maksimum F1"))
+    print(f"\n{'label':<14}{'current':>13}{'P':>7}{'R':>7}{'F1':>7}   {'new':>13}{'P':>7}{'R':>7}{'F1':>7}")
+
+    updated = dict(existing)
+    for i, name in enumerate(class_names):
+        if only_labels and name not in only_labels:
+            continue
+        points = operating_points(logits[:, i], labels[:, i])
+        best = choose_threshold(points, min_precision)
+        new_threshold = probability_threshold(points["threshold"][best])
+
+        old_threshold = existing.get(name, 0.5)
+        old = metrics_at(logits[:, i], labels[:, i], old_threshold)
+        # Yuvarlanmış eşikle tekrar ölç: tabloya yazılan değer ne ise o
+        new = metrics_at(logits[:, i], labels[:, i], new_threshold)
+        updated[name] = new_threshold
+
+        print(f"{name:<14}{old_threshold:>13.10g}{old['precision']:>7.3f}{old['recall']:>7.3f}{old['f1']:>7.3f}   "
+              f"{new_threshold:>13.10g}{new['precision']:>7.3f}{new['recall']:>7.3f}{new['f1']:>7.3f}")
+
+    print("\nTHRESHOLDS = {")
+    for name in class_names:
+        print(f'    "{name}": {updated.get(name, 0.5)!r},')
+    print("}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(updated, f, indent=2)
+        print(f"\n[INFO] Eşikler kaydedildi: {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test seti logit'leri üzerinden THRESHOLDS kalibrasyonu")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect_parser = commands.add_parser("collect", help="Modeli test setinde bir kez çalıştırıp logit'leri kaydet")
+    collect_parser.add_argument("--weights", default="75epoch-convnextbase.pth")
+    collect_parser.add_argument("--arch", default="convnext_base", help="Öğrenci modeller için (ör. mobilenet_v3_large)")
+    collect_parser.add_argument("--data-dir", default=None, help="Varsayılan: skinanalysismodel.klasor_yolu")
+    collect_parser.add_argument("--output", default="holdout_logits.npz")
+    collect_parser.add_argument("--batch-size", type=int, default=32)
+    collect_parser.add_argument("--num-workers", type=int, default=2)
+
+    sweep_parser = commands.add_parser("sweep", help="Kaydedilmiş logit'ler üzerinde eşik taraması")
+    sweep_parser.add_argument("logits", help="collect çıktısı (.npz)")
+    sweep_parser.add_argument("--min-precision", type=float, default=None,
+                              help="Verilirse F1 yerine bu precision'ı sağlayan en yüksek recall seçilir")
+    sweep_parser.add_argument("--label", action="append", default=[], help="Sadece bu etiket(ler)i ayarla")
+    sweep_parser.add_argument("--output", default=None, help="Yeni eşikleri JSON olarak kaydet")
+
+    args = parser.parse_args()
+    if args.command == "collect":
+        collect(args.weights, args.output, args.data_dir, args.batch_size, args.num_workers, args.arch)
+    else:
+        sweep(args.logits, args.min_precision, set(args.label), args.output)
+
+
+if __name__ == "__main__":
+    main()
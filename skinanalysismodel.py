@@ -1,88 +1,109 @@
+import argparse
 import os
 import random
+import time
 import numpy as np
 from PIL import Image
 from collections import defaultdict
 from sklearn.model_selection import train_test_split
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
 import torchvision.transforms as transforms
 from torch.utils.data import Dataset, DataLoader, ConcatDataset
 
-from torchvision.models import convnext_base, ConvNeXt_Base_Weights
+from torchvision.models import (
+    convnext_base, ConvNeXt_Base_Weights, convnext_tiny, ConvNeXt_Tiny_Weights,
+    mobilenet_v3_large, MobileNet_V3_Large_Weights, efficientnet_b0, EfficientNet_B0_Weights,
+)
 
 # ----------------------------------------------------------------------------
 # SEED & DEVICE
 # ----------------------------------------------------------------------------
 SEED = 42
-random.seed(SEED)
-np.random.seed(SEED)
-torch.manual_seed(SEED)
-torch.cuda.manual_seed_all(SEED)
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"[INFO] Using device: {device}")
 
-# ----------------------------------------------------------------------------
-# VERİ OKUMA - Sağlam Healthy Etiketi ile
-# ----------------------------------------------------------------------------
 klasor_yolu = '/kaggle/input/cropped-data/croppedData'
 class_names = ['acne', 'pockmark', 'stain', 'wrinkle', 'black_circle', 'healthy']
 num_classes = len(class_names)
 
-image_paths = []
-labels_list = []
-class_counts = {name: 0 for name in class_names}
-
-for dosya in os.listdir(klasor_yolu):
-    if dosya.lower().endswith(('.png', '.jpg', '.jpeg')):
-        filename = os.path.splitext(dosya)[0]
-        parts = filename.split('_')
-        if len(parts) < 9:
-            continue
-        try:
-            label = list(map(int, parts[4:9]))
-        except:
-            continue
-
-        # Stain ve wrinkle birlikte olanları (0_0_1_1_0) filtrele ve %50'sini çıkar
-        if label == [0, 0, 1, 1, 0]:
-            if random.random() < 0.5:  # %50 şansla atla
+# Her sınıf için ayrı katsayı ile
+# [acne, pockmark, stain, wrinkle, black_circle, healthy]
+custom_multipliers = [3.5, 3.5, 1.0, 1.0, 3.0, 1.0]
+
+MODEL_PATH = "75epoch-convnextbase.pth"
+
+# Öğretmen convnext_base; diğerleri distillation için öğrenci adayları.
+# API tarafında aynı isimler MODEL_ARCH ile seçilir (SkinCareAPI/inference/model.py)
+ARCHITECTURES = {
+    "convnext_base": (convnext_base, ConvNeXt_Base_Weights.IMAGENET1K_V1),
+    "convnext_tiny": (convnext_tiny, ConvNeXt_Tiny_Weights.IMAGENET1K_V1),
+    "mobilenet_v3_large": (mobilenet_v3_large, MobileNet_V3_Large_Weights.IMAGENET1K_V2),
+    "efficientnet_b0": (efficientnet_b0, EfficientNet_B0_Weights.IMAGENET1K_V1),
+}
+
+
+def seed_everything(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    torch.cuda.manual_seed_all(seed)
+
+
+# ----------------------------------------------------------------------------
+# VERİ OKUMA - Sağlam Healthy Etiketi ile
+# ----------------------------------------------------------------------------
+def read_dataset(klasor_yolu=klasor_yolu):
+    """Dosya adlarından etiketleri okur; tekrarlanabilir bölme için seed_everything()'den sonra çağrılmalı."""
+    image_paths = []
+    labels_list = []
+    class_counts = {name: 0 for name in class_names}
+
+    for dosya in os.listdir(klasor_yolu):
+        if dosya.lower().endswith(('.png', '.jpg', '.jpeg')):
+            filename = os.path.splitext(dosya)[0]
+            parts = filename.split('_')
+            if len(parts) < 9:
+                continue
+            try:
+                label = list(map(int, parts[4:9]))
+            except:
                 continue
 
-        label.append(1 if sum(label) == 0 else 0)  # Healthy etiketi
+            # Stain ve wrinkle birlikte olanları (0_0_1_1_0) filtrele ve %50'sini çıkar
+            if label == [0, 0, 1, 1, 0]:
+                if random.random() < 0.5:  # %50 şansla atla
+                    continue
 
-        image_paths.append(os.path.join(klasor_yolu, dosya))
-        labels_list.append(label)
+            label.append(1 if sum(label) == 0 else 0)  # Healthy etiketi
 
-        for i, flag in enumerate(label):
-            if flag == 1:
-                class_counts[class_names[i]] += 1
+            image_paths.append(os.path.join(klasor_yolu, dosya))
+            labels_list.append(label)
 
-labels = np.array(labels_list)
+            for i, flag in enumerate(label):
+                if flag == 1:
+                    class_counts[class_names[i]] += 1
 
-print("\n[ETİKET DAĞILIMI] (Healthy dahil, filtrelenmiş)")
-for cname, ccount in class_counts.items():
-    print(f"{cname}: {ccount} adet")
+    return image_paths, labels_list, class_counts
 
-# Sınıf bazlı pos_weight tanımı
-total_samples = len(labels_list)
-pos_weights = []
 
-# Her sınıf için ayrı katsayı ile
-# [acne, pockmark, stain, wrinkle, black_circle, healthy]
-custom_multipliers = [3.5, 3.5, 1.0, 1.0, 3.0, 1.0]
+def compute_pos_weights(labels_list):
+    # Sınıf bazlı pos_weight tanımı
+    labels = np.array(labels_list)
+    total_samples = len(labels_list)
+    pos_weights = []
+
+    for i in range(num_classes):
+        pos_count = np.sum(labels[:, i])
+        neg_count = total_samples - pos_count
+        multiplier = custom_multipliers[i]
+        pos_weight = (neg_count / pos_count) * multiplier if pos_count > 0 else 1.0
+        pos_weights.append(pos_weight)
 
-for i in range(num_classes):
-    pos_count = np.sum(labels[:, i])
-    neg_count = total_samples - pos_count
-    multiplier = custom_multipliers[i]
-    pos_weight = (neg_count / pos_count) * multiplier if pos_count > 0 else 1.0
-    pos_weights.append(pos_weight)
+    return torch.FloatTensor(pos_weights).to(device)
 
-pos_weights = torch.FloatTensor(pos_weights).to(device)
-print(f"\n[CLASS-WISE POS WEIGHTS] {pos_weights}")
 
 # ----------------------------------------------------------------------------
 # TRANSFORM & DATASET
@@ -116,31 +137,27 @@ class SkinDataset(Dataset):
 # ----------------------------------------------------------------------------
 # TRAIN / TEST AYIRIMI
 # ----------------------------------------------------------------------------
-X_train_paths, X_test_paths, y_train, y_test = train_test_split(
-    image_paths, labels_list, test_size=0.2, random_state=SEED
-)
+def split_dataset(image_paths, labels_list):
+    return train_test_split(image_paths, labels_list, test_size=0.2, random_state=SEED)
 
-original_train = SkinDataset(X_train_paths, y_train, transform=base_transform)
-train_dataset = original_train
-test_dataset = SkinDataset(X_test_paths, y_test, transform=base_transform)
 
-train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
-test_loader = DataLoader(test_dataset, batch_size=32, shuffle=False)
+def load_test_split(klasor_yolu=klasor_yolu):
+    """Eğitimde ayrılan test setini (yollar, etiketler) aynen yeniden üretir."""
+    seed_everything(SEED)
+    image_paths, labels_list, _ = read_dataset(klasor_yolu)
+    _, X_test_paths, _, y_test = split_dataset(image_paths, labels_list)
+    return X_test_paths, y_test
 
-print(f"\n[EĞİTİM VERİSİ] Orijinal: {len(original_train)} ")
 
 # ----------------------------------------------------------------------------
 # MODEL
 # ----------------------------------------------------------------------------
-model = convnext_base(weights=ConvNeXt_Base_Weights.IMAGENET1K_V1)
-model.classifier[2] = nn.Linear(model.classifier[2].in_features, 6)
-model = model.to(device)
-
-# ----------------------------------------------------------------------------
-# LOSS & OPTİMİZASYON
-# ----------------------------------------------------------------------------
-criterion = nn.BCEWithLogitsLoss(pos_weight=pos_weights)
-optimizer = optim.Adam(model.parameters(), lr=1e-4)
+def build_model(pretrained=True, arch="convnext_base"):
+    constructor, weights = ARCHITECTURES[arch]
+    model = constructor(weights=weights if pretrained else None)
+    # Son Linear katman 6 etikete (convnext_base için classifier[2])
+    model.classifier[-1] = nn.Linear(model.classifier[-1].in_features, num_classes)
+    return model.to(device)
 
 
 # Stain-Wrinkle korelasyon penalty fonksiyonu
@@ -170,248 +187,236 @@ def healthy_conflict_penalty(outputs, alpha=0.1):
 # ----------------------------------------------------------------------------
 # EĞİTİM DÖNGÜSÜ
 # ----------------------------------------------------------------------------
-epochs = 75
-model.train()
-
-for epoch in range(epochs):
-    running_loss = 0.0
-    for images, labels_6d in train_loader:
-        images = images.to(device)
-        labels_6d = labels_6d.to(device)
-
-        optimizer.zero_grad()
-        outputs = model(images)
-
-        # Ana loss
-        loss = criterion(outputs, labels_6d)
-
-        # Ek cezalar
-        penalty_sw = stain_wrinkle_penalty(outputs, alpha=0.05)
-        penalty_healthy = healthy_conflict_penalty(outputs, alpha=0.1)
-
-        # Toplam loss
-        total_loss = loss + penalty_sw + penalty_healthy
-
-        total_loss.backward()
-        optimizer.step()
-
-        running_loss += total_loss.item() * images.size(0)
-
-    epoch_loss = running_loss / len(train_dataset)
-    print(f"Epoch [{epoch + 1}/{epochs}], Loss: {epoch_loss:.4f}")
-    torch.cuda.empty_cache()
-
-# -----------------------------------------------------------------------------
-# EĞİTİLMİŞ MODELİ KAYDETME
-# -----------------------------------------------------------------------------
-torch.save(model.state_dict(), "75epoch-convnextbase.pth")
-print("\n[INFO] Model kaydedildi: '75epoch-convnextbase.pth'")
-
-import os
-import random
-import numpy as np
-from PIL import Image
-from collections import defaultdict
-from sklearn.model_selection import train_test_split
-import torch
-import torch.nn as nn
-import torch.optim as optim
-import torchvision.transforms as transforms
-from torch.utils.data import Dataset, DataLoader, ConcatDataset
-
-from torchvision.models import convnext_base, ConvNeXt_Base_Weights
-
-# ----------------------------------------------------------------------------
-# SEED & DEVICE
-# ----------------------------------------------------------------------------
-SEED = 42
-random.seed(SEED)
-np.random.seed(SEED)
-torch.manual_seed(SEED)
-torch.cuda.manual_seed_all(SEED)
-
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"[INFO] Using device: {device}")
-
-# ----------------------------------------------------------------------------
-# VERİ OKUMA - Sağlam Healthy Etiketi ile
-# ----------------------------------------------------------------------------
-klasor_yolu = '/kaggle/input/cropped-data/croppedData'
-class_names = ['acne', 'pockmark', 'stain', 'wrinkle', 'black_circle', 'healthy']
-num_classes = len(class_names)
-
-image_paths = []
-labels_list = []
-class_counts = {name: 0 for name in class_names}
-
-for dosya in os.listdir(klasor_yolu):
-    if dosya.lower().endswith(('.png', '.jpg', '.jpeg')):
-        filename = os.path.splitext(dosya)[0]
-        parts = filename.split('_')
-        if len(parts) < 9:
-            continue
-        try:
-            label = list(map(int, parts[4:9]))
-        except:
-            continue
-
-        # Stain ve wrinkle birlikte olanları (0_0_1_1_0) filtrele ve %50'sini çıkar
-        if label == [0, 0, 1, 1, 0]:
-            if random.random() < 0.5:  # %50 şansla atla
-                continue
+def train(model, train_loader, criterion, optimizer, epochs=75):
+    model.train()
 
-        label.append(1 if sum(label) == 0 else 0)  # Healthy etiketi
+    for epoch in range(epochs):
+        running_loss = 0.0
+        for images, labels_6d in train_loader:
+            images = images.to(device)
+            labels_6d = labels_6d.to(device)
 
-        image_paths.append(os.path.join(klasor_yolu, dosya))
-        labels_list.append(label)
+            optimizer.zero_grad()
+            outputs = model(images)
 
-        for i, flag in enumerate(label):
-            if flag == 1:
-                class_counts[class_names[i]] += 1
+            # Ana loss
+            loss = criterion(outputs, labels_6d)
 
-labels = np.array(labels_list)
+            # Ek cezalar
+            penalty_sw = stain_wrinkle_penalty(outputs, alpha=0.05)
+            penalty_healthy = healthy_conflict_penalty(outputs, alpha=0.1)
 
-print("\n[ETİKET DAĞILIMI] (Healthy dahil, filtrelenmiş)")
-for cname, ccount in class_counts.items():
-    print(f"{cname}: {ccount} adet")
+            # Toplam loss
+            total_loss = loss + penalty_sw + penalty_healthy
 
-# Sınıf bazlı pos_weight tanımı
-total_samples = len(labels_list)
-pos_weights = []
+            total_loss.backward()
+            optimizer.step()
 
-# Her sınıf için ayrı katsayı ile
-# [acne, pockmark, stain, wrinkle, black_circle, healthy]
-custom_multipliers = [3.5, 3.5, 1.0, 1.0, 3.0, 1.0]
+            running_loss += total_loss.item() * images.size(0)
 
-for i in range(num_classes):
-    pos_count = np.sum(labels[:, i])
-    neg_count = total_samples - pos_count
-    multiplier = custom_multipliers[i]
-    pos_weight = (neg_count / pos_count) * multiplier if pos_count > 0 else 1.0
-    pos_weights.append(pos_weight)
+        epoch_loss = running_loss / len(train_loader.dataset)
+        print(f"Epoch [{epoch + 1}/{epochs}], Loss: {epoch_loss:.4f}")
+        torch.cuda.empty_cache()
 
-pos_weights = torch.FloatTensor(pos_weights).to(device)
-print(f"\n[CLASS-WISE POS WEIGHTS] {pos_weights}")
 
 # ----------------------------------------------------------------------------
-# TRANSFORM & DATASET
+# DISTILLATION (küçük öğrenci model)
 # ----------------------------------------------------------------------------
-base_transform = transforms.Compose([
-    transforms.Resize(256),
-    transforms.CenterCrop(224),
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406],
-                         [0.229, 0.224, 0.225])
-])
-
+class DistillDataset(Dataset):
+    """SkinDataset örneklerine öğretmenin (önceden hesaplanmış) logit'lerini ekler."""
 
-class SkinDataset(Dataset):
-    def __init__(self, image_paths, labels, transform=None):
-        self.image_paths = image_paths
-        self.labels = labels
-        self.transform = transform
+    def __init__(self, dataset, teacher_logits):
+        self.dataset = dataset
+        self.teacher_logits = teacher_logits
 
     def __len__(self):
-        return len(self.image_paths)
+        return len(self.dataset)
 
     def __getitem__(self, idx):
-        img = Image.open(self.image_paths[idx]).convert('RGB')
-        if self.transform:
-            img = self.transform(img)
-        label = torch.FloatTensor(self.labels[idx])
-        return img, label
-
-
-# ----------------------------------------------------------------------------
-# TRAIN / TEST AYIRIMI
-# ----------------------------------------------------------------------------
-X_train_paths, X_test_paths, y_train, y_test = train_test_split(
-    image_paths, labels_list, test_size=0.2, random_state=SEED
-)
+        img, label = self.dataset[idx]
+        return img, label, self.teacher_logits[idx]
 
-original_train = SkinDataset(X_train_paths, y_train, transform=base_transform)
-train_dataset = original_train
-test_dataset = SkinDataset(X_test_paths, y_test, transform=base_transform)
 
-train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
-test_loader = DataLoader(test_dataset, batch_size=32, shuffle=False)
+def compute_teacher_logits(teacher, dataset, batch_size=64):
+    """Öğretmeni eğitim seti üzerinde bir kez çalıştırır (eğitim transform'u deterministik)."""
+    teacher.eval()
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=False)
+    outputs = []
+    with torch.inference_mode():
+        for images, _ in loader:
+            outputs.append(teacher(images.to(device)).float().cpu())
+    return torch.cat(outputs)
 
-print(f"\n[EĞİTİM VERİSİ] Orijinal: {len(original_train)} ")
 
-# ----------------------------------------------------------------------------
-# MODEL
-# ----------------------------------------------------------------------------
-model = convnext_base(weights=ConvNeXt_Base_Weights.IMAGENET1K_V1)
-model.classifier[2] = nn.Linear(model.classifier[2].in_features, 6)
-model = model.to(device)
+def distillation_loss(student_logits, labels, teacher_logits, criterion, alpha=0.5, temperature=2.0):
+    """Gerçek etiketlerle BCE (pos_weight'li criterion) + öğretmenin sigmoid çıktılarıyla BCE."""
+    # Yumuşak terim T^2 ile ölçeklenir: gradyanı T değişince sert terimle aynı mertebede kalır
+    hard = criterion(student_logits, labels)
+    soft_targets = torch.sigmoid(teacher_logits / temperature)
+    soft = F.binary_cross_entropy_with_logits(student_logits / temperature, soft_targets) * temperature ** 2
+    return alpha * hard + (1 - alpha) * soft
 
-# ----------------------------------------------------------------------------
-# LOSS & OPTİMİZASYON
-# ----------------------------------------------------------------------------
-criterion = nn.BCEWithLogitsLoss(pos_weight=pos_weights)
-optimizer = optim.Adam(model.parameters(), lr=1e-4)
 
+def distill(student, train_loader, criterion, optimizer, epochs=75, alpha=0.5, temperature=2.0):
+    student.train()
 
-# Stain-Wrinkle korelasyon penalty fonksiyonu
-def stain_wrinkle_penalty(outputs, alpha=0.1):
-    """Stain ve wrinkle arasındaki korelasyonu azaltmak için penalty"""
-    stain_probs = torch.sigmoid(outputs[:, 2])  # stain index: 2
-    wrinkle_probs = torch.sigmoid(outputs[:, 3])  # wrinkle index: 3
-
-    # Pearson korelasyon benzeri penalty
-    penalty = torch.mean((stain_probs - stain_probs.mean()) * (wrinkle_probs - wrinkle_probs.mean()))
-    return alpha * penalty.abs()
+    for epoch in range(epochs):
+        running_loss = 0.0
+        for images, labels_6d, teacher_logits in train_loader:
+            images = images.to(device)
+            labels_6d = labels_6d.to(device)
+            teacher_logits = teacher_logits.to(device)
 
+            optimizer.zero_grad()
+            outputs = student(images)
+            loss = distillation_loss(outputs, labels_6d, teacher_logits, criterion, alpha, temperature)
+            loss.backward()
+            optimizer.step()
 
-def healthy_conflict_penalty(outputs, alpha=0.1):
-    """
-    Aynı anda hem healthy hem de diğer sınıflar yüksekse ceza uygular.
-    """
-    probs = torch.sigmoid(outputs)  # (batch_size, 6)
-    healthy_probs = probs[:, 5]  # 6. sınıf = healthy
-    other_probs_sum = probs[:, :5].sum(dim=1)  # İlk 5 sınıfın toplamı
+            running_loss += loss.item() * images.size(0)
 
-    # Eğer healthy + diğerler birlikte yüksekse → ceza
-    conflict = healthy_probs * other_probs_sum  # (batch_size,)
-    return alpha * torch.mean(conflict)
+        epoch_loss = running_loss / len(train_loader.dataset)
+        print(f"Epoch [{epoch + 1}/{epochs}], Distill Loss: {epoch_loss:.4f}")
+        torch.cuda.empty_cache()
 
 
 # ----------------------------------------------------------------------------
-# EĞİTİM DÖNGÜSÜ
+# KARŞILAŞTIRMA (CPU gecikmesi + doğruluk)
 # ----------------------------------------------------------------------------
-epochs = 75
-model.train()
-
-for epoch in range(epochs):
-    running_loss = 0.0
-    for images, labels_6d in train_loader:
-        images = images.to(device)
-        labels_6d = labels_6d.to(device)
-
-        optimizer.zero_grad()
-        outputs = model(images)
-
-        # Ana loss
-        loss = criterion(outputs, labels_6d)
+def evaluate(model, loader, thresholds):
+    """API ile aynı kural (p > eşik) ile tam eşleşme doğruluğu ve makro F1."""
+    model.eval()
+    probs, targets = [], []
+    with torch.inference_mode():
+        for images, labels_6d in loader:
+            probs.append(torch.sigmoid(model(images)).numpy())
+            targets.append(labels_6d.numpy())
+    predicted = np.concatenate(probs) > np.asarray(thresholds)
+    actual = np.concatenate(targets).astype(bool)
+
+    tp = (predicted & actual).sum(axis=0)
+    fp = (predicted & ~actual).sum(axis=0)
+    fn = (~predicted & actual).sum(axis=0)
+    f1 = np.divide(2 * tp, 2 * tp + fp + fn, out=np.zeros(len(tp)), where=(2 * tp + fp + fn) > 0)
+    return {
+        "exact_match": float((predicted == actual).all(axis=1).mean()),
+        "macro_f1": float(f1.mean()),
+    }
+
+
+def cpu_latency_ms(model, batch_size=1, runs=30, warmup=5):
+    """CPU'da tek forward'ın medyan süresi (ms)."""
+    model.eval()
+    batch = torch.zeros(batch_size, 3, 224, 224)
+    timings = []
+    with torch.inference_mode():
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            model(batch)
+            if i >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def comparison_table(models, test_loader, thresholds):
+    print(f"\n{'model':<22}{'params(M)':>10}{'bs=1 ms':>10}{'bs=8 ms/img':>13}{'exact':>8}{'macroF1':>9}")
+    for name, model in models.items():
+        model = model.cpu()
+        params = sum(p.numel() for p in model.parameters()) / 1e6
+        scores = evaluate(model, test_loader, thresholds)
+        single = cpu_latency_ms(model, batch_size=1)
+        batched = cpu_latency_ms(model, batch_size=8) / 8
+        print(f"{name:<22}{params:>10.1f}{single:>10.1f}{batched:>13.1f}"
+              f"{scores['exact_match']:>8.3f}{scores['macro_f1']:>9.3f}")
+
+
+def api_thresholds():
+    # API'deki THRESHOLDS (SkinCareAPI/data/skin_issues.py), etiket sırasıyla
+    from calibrate_thresholds import current_thresholds
+    thresholds = current_thresholds()
+    return [thresholds.get(name, 0.5) for name in class_names]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cilt analizi modeli eğitimi")
+    parser.add_argument("--mode", choices=["train", "distill"], default="train",
+                        help="train: convnext_base öğretmeni eğit; distill: kaydedilmiş öğretmenden küçük öğrenci eğit")
+    parser.add_argument("--epochs", type=int, default=75)
+    parser.add_argument("--teacher", default=MODEL_PATH, help="distill: öğretmen ağırlıkları")
+    parser.add_argument("--student", choices=[a for a in ARCHITECTURES if a != "convnext_base"],
+                        default="mobilenet_v3_large")
+    parser.add_argument("--alpha", type=float, default=0.5, help="distill: gerçek etiket kaybının ağırlığı")
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--output", default=None, help="Varsayılan: train -> MODEL_PATH, distill -> student-<arch>.pth")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    seed_everything(SEED)
+    print(f"[INFO] Using device: {device}")
+
+    image_paths, labels_list, class_counts = read_dataset(klasor_yolu)
+
+    print("\n[ETİKET DAĞILIMI] (Healthy dahil, filtrelenmiş)")
+    for cname, ccount in class_counts.items():
+        print(f"{cname}: {ccount} adet")
+
+    pos_weights = compute_pos_weights(labels_list)
+    print(f"\n[CLASS-WISE POS WEIGHTS] {pos_weights}")
+
+    X_train_paths, X_test_paths, y_train, y_test = split_dataset(image_paths, labels_list)
+
+    original_train = SkinDataset(X_train_paths, y_train, transform=base_transform)
+    train_dataset = original_train
+
+    train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
+
+    print(f"\n[EĞİTİM VERİSİ] Orijinal: {len(original_train)} ")
+
+    if args.mode == "distill":
+        run_distillation(args, original_train, X_test_paths, y_test, pos_weights)
+        return
+
+    model = build_model()
+
+    # ------------------------------------------------------------------------
+    # LOSS & OPTİMİZASYON
+    # ------------------------------------------------------------------------
+    criterion = nn.BCEWithLogitsLoss(pos_weight=pos_weights)
+    optimizer = optim.Adam(model.parameters(), lr=1e-4)
+
+    train(model, train_loader, criterion, optimizer, epochs=args.epochs)
+
+    # ------------------------------------------------------------------------
+    # EĞİTİLMİŞ MODELİ KAYDETME
+    # ------------------------------------------------------------------------
+    output = args.output or MODEL_PATH
+    torch.save(model.state_dict(), output)
+    print(f"\n[INFO] Model kaydedildi: '{output}'")
+
+
+def run_distillation(args, train_dataset, X_test_paths, y_test, pos_weights):
+    teacher = build_model(pretrained=False)
+    teacher.load_state_dict(torch.load(args.teacher, map_location=device, weights_only=True))
+    print(f"\n[INFO] Öğretmen çıktıları hesaplanıyor: '{args.teacher}'")
+    teacher_logits = compute_teacher_logits(teacher, train_dataset)
 
-        # Ek cezalar
-        penalty_sw = stain_wrinkle_penalty(outputs, alpha=0.05)
-        penalty_healthy = healthy_conflict_penalty(outputs, alpha=0.1)
+    distill_loader = DataLoader(DistillDataset(train_dataset, teacher_logits), batch_size=32, shuffle=True)
+    student = build_model(arch=args.student)
+    criterion = nn.BCEWithLogitsLoss(pos_weight=pos_weights)
+    optimizer = optim.Adam(student.parameters(), lr=1e-4)
 
-        # Toplam loss
-        total_loss = loss + penalty_sw + penalty_healthy
+    distill(student, distill_loader, criterion, optimizer, epochs=args.epochs,
+            alpha=args.alpha, temperature=args.temperature)
 
-        total_loss.backward()
-        optimizer.step()
+    output = args.output or f"student-{args.student}.pth"
+    torch.save(student.state_dict(), output)
+    print(f"\n[INFO] Öğrenci model kaydedildi: '{output}' (API: MODEL_ARCH={args.student} MODEL_PATH={output})")
 
-        running_loss += total_loss.item() * images.size(0)
+    test_loader = DataLoader(SkinDataset(X_test_paths, y_test, transform=base_transform), batch_size=32, shuffle=False)
+    comparison_table({"convnext_base (teacher)": teacher, args.student: student}, test_loader, api_thresholds())
 
-    epoch_loss = running_loss / len(train_dataset)
-    print(f"Epoch [{epoch + 1}/{epochs}], Loss: {epoch_loss:.4f}")
-    torch.cuda.empty_cache()
 
-# -----------------------------------------------------------------------------
-# EĞİTİLMİŞ MODELİ KAYDETME
-# -----------------------------------------------------------------------------
-torch.save(model.state_dict(), "75epoch-convnextbase.pth")
-print("\n[INFO] Model kaydedildi: '75epoch-convnextbase.pth'")
\ No newline at end of file
+if __name__ == "__main__":
+    main()